@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+""" compare heap-based CronScheduler against TimingWheelScheduler
+
+Usage: python bench/bench_scheduler.py [JOB_COUNT ...]
+"""
+
+import sys
+import time
+import random
+import datetime
+
+# {{{ import target module according to Python version
+try:
+	import crontimesequence  #@UnusedImport
+except Exception:
+	if sys.version_info.major > 2:
+		sys.path.append('lib3')
+	else:
+		sys.path.append('lib2')
+	import crontimesequence  #@Reimport
+# }}} import target module according to Python version
+
+DEFAULT_JOB_COUNTS = (10000, 100000, 1000000)
+
+# number of distinct schedules shared among jobs
+SCHEDULE_POOL_SIZE = 500
+
+# length of simulated run after all jobs are inserted
+SIMULATE_MINUTES = 180
+
+
+def make_schedule_pool(rnd):
+	result = []
+	for _i in range(SCHEDULE_POOL_SIZE):
+		rule_minute = rnd.choice(("*", "*/5", "*/15", str(rnd.randrange(60)), "%d,%d" % (rnd.randrange(30), rnd.randrange(30, 60))))
+		rule_hour = rnd.choice(("*", "*", "*/2", str(rnd.randrange(24)), "9-17"))
+		rule_day = rnd.choice(("*", "*", "*", "1", "15", "L"))
+		rule_weekday = rnd.choice(("*", "*", "1-5", "0,6"))
+		result.append(crontimesequence.CronSchedule(rule_minute, rule_hour, rule_day, "*", rule_weekday))
+	return result
+
+
+def run_backend(scheduler_class, schedules, tstamp_start):
+	scheduler = scheduler_class()
+	t = time.time()
+	for job_id, schedule in enumerate(schedules):
+		scheduler.add(job_id, schedule, tstamp_start)
+	insert_cost = time.time() - t
+	fire_count = 0
+	t = time.time()
+	now = tstamp_start
+	for _i in range(SIMULATE_MINUTES):
+		now = now + datetime.timedelta(minutes=1)
+		fire_count = fire_count + len(scheduler.pop_due(now))
+	expire_cost = time.time() - t
+	return (insert_cost, expire_cost, fire_count)
+
+
+def main(job_counts):
+	rnd = random.Random(1)
+	pool = make_schedule_pool(rnd)
+	tstamp_start = datetime.datetime(2019, 3, 4, 5, 6, 30)
+	print("%10s %-22s %12s %12s %10s %14s" % ("jobs", "backend", "insert (s)", "expire (s)", "fires", "us / op"))
+	for job_count in job_counts:
+		schedules = [rnd.choice(pool) for _i in range(job_count)]
+		for scheduler_class in (crontimesequence.CronScheduler, crontimesequence.TimingWheelScheduler):
+			insert_cost, expire_cost, fire_count = run_backend(scheduler_class, schedules, tstamp_start)
+			per_op = (insert_cost + expire_cost) * 1000000.0 / (job_count + fire_count)
+			print("%10d %-22s %12.3f %12.3f %10d %14.2f" % (job_count, scheduler_class.__name__, insert_cost, expire_cost, fire_count, per_op))
+
+
+if __name__ == '__main__':
+	main([int(v) for v in sys.argv[1:]] or DEFAULT_JOB_COUNTS)
+
+# vim: ts=4 sw=4 ai nowrap
@@ -3,6 +3,8 @@
 
 """ build time sequence with cron syntax """
 
+import bisect
+import calendar
 import datetime
 import logging
 _log = logging.getLogger(__name__)
@@ -497,6 +499,307 @@ def check_timestamp_by_rule(rulearray, tstamp):
 	return False
 # ### def check_timestamp_by_rule
 
+# the Gregorian calendar (including the weekday of dates) repeats itself every 400 years
+_CALENDAR_CYCLE_YEARS = 400
+
+_DATE_RULE_TYPES = (
+		LastDayOfMonthValue,
+		NearestWorkDayValue,
+		LastWeekdayOfMonthValue,
+		NthWeekdayOfMonthValue,
+)
+
+
+def _collect_scalar_values(rset, fieldname, lower_bound, upper_bound):
+	""" (internal) collect values accepted by given rule set of minute, hour or month field
+
+	Parameter:
+		rset - rule set of the field (None for no restriction)
+		fieldname - the datetime component of the field
+		lower_bound, upper_bound - range of field value (upper bound exclusive)
+	Return:
+		sorted tuple of accepted values, or None if the rule set contains rule other than ScalarValue of given field
+	"""
+	if rset is None:
+		return tuple(range(lower_bound, upper_bound))
+	result = set()
+	for robj in rset:
+		if (not isinstance(robj, ScalarValue)) or (robj.fieldname != fieldname):
+			return None
+		result.add(robj.v)
+	return tuple(sorted(result))
+# ### def _collect_scalar_values
+
+
+def _is_date_rule_set(rset):
+	""" (internal) check if rules in given rule set of day or weekday field only depend on the date part of time-stamp """
+	if rset is None:
+		return True
+	for robj in rset:
+		if isinstance(robj, ScalarValue):
+			if robj.fieldname not in ('day', 'month', 'weekday',):
+				return False
+		elif not isinstance(robj, _DATE_RULE_TYPES):
+			return False
+	return True
+# ### def _is_date_rule_set
+
+
+def _is_rule_set_accept(rset, d):
+	if rset is None:
+		return True
+	for robj in rset:
+		if robj.is_accept(d):
+			return True
+	return False
+# ### def _is_rule_set_accept
+
+
+def _accepted_days_of_month(rulearray, year, month):
+	""" (internal) list days of given month which are accepted by the day and weekday rule sets """
+	rs_day = rulearray[2]
+	rs_weekday = rulearray[4]
+	result = []
+	for day in range(1, calendar.monthrange(year, month)[1] + 1):
+		d = datetime.datetime(year, month, day)
+		if _is_rule_set_accept(rs_day, d) and _is_rule_set_accept(rs_weekday, d):
+			result.append(day)
+	return result
+# ### def _accepted_days_of_month
+
+
+def _collect_rule_tables(rulearray):
+	""" (internal) collect accepted minutes, hours and months of given rule array for the field-skipping engine
+
+	Return:
+		3 element tuple of sorted minute, hour and month values, or None if the rule array contains rules
+		which the field-skipping engine cannot handle
+	"""
+	minutes = _collect_scalar_values(rulearray[0], 'minute', 0, 60)
+	hours = _collect_scalar_values(rulearray[1], 'hour', 0, 24)
+	months = _collect_scalar_values(rulearray[3], 'month', 1, 13)
+	if (minutes is None) or (hours is None) or (months is None) or (not _is_date_rule_set(rulearray[2])) or (not _is_date_rule_set(rulearray[4])):
+		return None
+	return (minutes, hours, months,)
+# ### def _collect_rule_tables
+
+
+def _truncate_to_minute(tstamp):
+	return datetime.datetime(tstamp.year, tstamp.month, tstamp.day, tstamp.hour, tstamp.minute)
+# ### def _truncate_to_minute
+
+
+def _last_minute_before(tstamp):
+	""" (internal) get the last minute-aligned time-stamp which is earlier than given time-stamp """
+	d = _truncate_to_minute(tstamp)
+	if d == tstamp:
+		d = d - datetime.timedelta(minutes=1)
+	return d
+# ### def _last_minute_before
+
+
+def _scan_forward(rulearray, d, tstamp_end):
+	""" (internal) minute-by-minute scanning for rule arrays which field-skipping engine cannot handle """
+	increment_delta = datetime.timedelta(minutes=1)
+	year_horizon = d.year + _CALENDAR_CYCLE_YEARS
+	while d.year <= year_horizon:
+		if (tstamp_end is not None) and (d >= tstamp_end):
+			return
+		if check_timestamp_by_rule(rulearray, d):
+			yield d
+			year_horizon = d.year + _CALENDAR_CYCLE_YEARS
+		try:
+			d = d + increment_delta
+		except OverflowError:
+			return
+# ### def _scan_forward
+
+
+def _iter_forward(rulearray, tstamp_start, tstamp_end):
+	""" (internal) generate time-stamps comply to given rule array in ascending order
+
+	The search jumps to the next allowed month, then day, then hour, then minute so the cost
+	scales with the number of matches rather than the width of the range.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring
+		tstamp_start - range start (inclusive, truncated to minute)
+		tstamp_end - range end (exclusive), None for open-ended search
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	d = _truncate_to_minute(tstamp_start)
+	tables = _collect_rule_tables(rulearray)
+	if tables is None:
+		for d in _scan_forward(rulearray, d, tstamp_end):
+			yield d
+		return
+	minutes, hours, months = tables
+	if (not minutes) or (not hours) or (not months):
+		return
+	year, month, day, hour, minute = d.year, d.month, d.day, d.hour, d.minute
+	year_horizon = year + _CALENDAR_CYCLE_YEARS
+	while (year <= datetime.MAXYEAR) and (year <= year_horizon):
+		if (tstamp_end is not None) and ((year, month,) > (tstamp_end.year, tstamp_end.month,)):
+			return
+		if month in months:
+			for accepted_day in _accepted_days_of_month(rulearray, year, month):
+				if accepted_day < day:
+					continue
+				if accepted_day > day:
+					day, hour, minute = accepted_day, 0, 0
+				for h in hours[bisect.bisect_left(hours, hour):]:
+					for m in minutes[bisect.bisect_left(minutes, minute if (h == hour) else 0):]:
+						d = datetime.datetime(year, month, day, h, m)
+						if (tstamp_end is not None) and (d >= tstamp_end):
+							return
+						yield d
+						year_horizon = year + _CALENDAR_CYCLE_YEARS
+				hour, minute = 0, 0
+				day = day + 1
+		idx = bisect.bisect_right(months, month)
+		if idx < len(months):
+			month = months[idx]
+		else:
+			year = year + 1
+			month = months[0]
+		day, hour, minute = 1, 0, 0
+# ### def _iter_forward
+
+
+def next_fire_time(rulearray, after):
+	""" find the first time-stamp after given time-stamp which complies to given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring
+		after - the time-stamp to search from (exclusive)
+	Return:
+		datetime object of the next fire time, or None if the rule array cannot be fulfilled
+	"""
+	try:
+		tstamp_start = _truncate_to_minute(after) + datetime.timedelta(minutes=1)
+	except OverflowError:
+		return None
+	for d in _iter_forward(rulearray, tstamp_start, None):
+		return d
+	return None
+# ### def next_fire_time
+
+
+def _scan_backward(rulearray, d, tstamp_start):
+	""" (internal) minute-by-minute backward scanning for rule arrays which field-skipping engine cannot handle """
+	decrement_delta = datetime.timedelta(minutes=1)
+	year_horizon = d.year - _CALENDAR_CYCLE_YEARS
+	while d.year >= year_horizon:
+		if (tstamp_start is not None) and (d < tstamp_start):
+			return
+		if check_timestamp_by_rule(rulearray, d):
+			yield d
+			year_horizon = d.year - _CALENDAR_CYCLE_YEARS
+		try:
+			d = d - decrement_delta
+		except OverflowError:
+			return
+# ### def _scan_backward
+
+
+def _iter_backward(rulearray, tstamp_start, tstamp_end):
+	""" (internal) generate time-stamps comply to given rule array in descending order
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring
+		tstamp_start - range start (inclusive, truncated to minute), None for open-ended search
+		tstamp_end - range end (exclusive)
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	if tstamp_start is not None:
+		tstamp_start = _truncate_to_minute(tstamp_start)
+	try:
+		d = _last_minute_before(tstamp_end)
+	except OverflowError:
+		return
+	tables = _collect_rule_tables(rulearray)
+	if tables is None:
+		for d in _scan_backward(rulearray, d, tstamp_start):
+			yield d
+		return
+	minutes, hours, months = tables
+	if (not minutes) or (not hours) or (not months):
+		return
+	year, month, day, hour, minute = d.year, d.month, d.day, d.hour, d.minute
+	year_horizon = year - _CALENDAR_CYCLE_YEARS
+	while (year >= datetime.MINYEAR) and (year >= year_horizon):
+		if (tstamp_start is not None) and ((year, month,) < (tstamp_start.year, tstamp_start.month,)):
+			return
+		if month in months:
+			for accepted_day in reversed(_accepted_days_of_month(rulearray, year, month)):
+				if accepted_day > day:
+					continue
+				if accepted_day < day:
+					day, hour, minute = accepted_day, 23, 59
+				for h in reversed(hours[:bisect.bisect_right(hours, hour)]):
+					for m in reversed(minutes[:bisect.bisect_right(minutes, minute if (h == hour) else 59)]):
+						d = datetime.datetime(year, month, day, h, m)
+						if (tstamp_start is not None) and (d < tstamp_start):
+							return
+						yield d
+						year_horizon = year - _CALENDAR_CYCLE_YEARS
+				hour, minute = 23, 59
+				day = day - 1
+		idx = bisect.bisect_left(months, month)
+		if idx > 0:
+			month = months[idx - 1]
+		else:
+			year = year - 1
+			month = months[-1]
+		day, hour, minute = 31, 23, 59
+# ### def _iter_backward
+
+
+def previous_fire_time(rulearray, before):
+	""" find the last time-stamp before given time-stamp which complies to given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring
+		before - the time-stamp to search from (exclusive)
+	Return:
+		datetime object of the previous fire time, or None if the rule array cannot be fulfilled
+	"""
+	for d in _iter_backward(rulearray, None, before):
+		return d
+	return None
+# ### def previous_fire_time
+
+
+def iter_reverse_range_by_rule(rulearray, tstamp_start, tstamp_end):
+	""" lazily generate time-stamps within given range by given rule array in descending order
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring
+		tstamp_start - range start (inclusive), None for no lower limit
+		tstamp_end - range end (exclusive)
+	Return:
+		generator of datetime object which complies to given rule array, latest first
+	"""
+	return _iter_backward(rulearray, tstamp_start, tstamp_end)
+# ### def iter_reverse_range_by_rule
+
+
+def iter_range_by_rule(rulearray, tstamp_start, tstamp_end=None):
+	""" lazily generate time-stamps within given range by given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring
+		tstamp_start - range start (inclusive)
+		tstamp_end=None - range end (exclusive), None for open-ended range
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	return _iter_forward(rulearray, tstamp_start, tstamp_end)
+# ### def iter_range_by_rule
+
+
 def filter_range_by_rule(rulearray, tstamp_start, tstamp_end):
 	""" filter time-stamps within given range by given rule array
 
@@ -507,17 +810,7 @@ def filter_range_by_rule(rulearray, tstamp_start, tstamp_end):
 	Return:
 		list of datetime object which complies to given rule array
 	"""
-	increment_delta = datetime.timedelta(minutes=1)
-	d = datetime.datetime(tstamp_start.year, tstamp_start.month, tstamp_start.day, tstamp_start.hour, tstamp_start.minute)
-
-	result = []
-
-	while d < tstamp_end:
-		if check_timestamp_by_rule(rulearray, d):
-			result.append(d)
-		d = d + increment_delta
-
-	return result
+	return list(iter_range_by_rule(rulearray, tstamp_start, tstamp_end))
 # ### def filter_range_by_rule
 
 
@@ -537,5 +830,21 @@ def get_datetime_by_cronrule(rule_minute, rule_hour, rule_day, rule_month, rule_
 # ### def get_datetime_by_cronrule
 
 
+def iter_datetime_by_cronrule(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, tstamp_start, tstamp_end=None, raise_error=False):
+	""" lazily generate time-stamps within given range with given rules
+
+	Parameter:
+		rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
+		tstamp_start - range start (inclusive)
+		tstamp_end=None - range end (exclusive), None for open-ended range
+		raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	rulearray = parse_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
+	return iter_range_by_rule(rulearray, tstamp_start, tstamp_end)
+# ### def iter_datetime_by_cronrule
+
+
 
 # vim: ts=4 sw=4 ai nowrap
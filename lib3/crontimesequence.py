@@ -1,10 +1,28 @@
 # -*- coding: utf-8 -*-
 """ build time sequence with cron syntax """
 
+import array
+import bisect
+import calendar
+import collections
+import collections.abc
 import datetime
+import heapq
+import itertools
 import logging
+import os
+import sys
+import threading
+import time
+try:
+	import zoneinfo
+except ImportError:
+	zoneinfo = None
 _log = logging.getLogger(__name__)
 
+# NumPy is imported on first use by _require_numpy, it is only needed by the vectorized functions
+numpy = None
+
 
 class CronRule:
 	def is_accept(self, d):  # pylint: disable=unused-argument
@@ -54,11 +72,112 @@ class ScalarValue(CronRule):
 		)
 
 
-class LastDayOfMonthValue(CronRule):
+# number of months which accepted days are kept by each month based rule object
+_MONTH_CACHE_SIZE = 128
+
+
+CacheInfo = collections.namedtuple('CacheInfo', (
+		'hits',
+		'misses',
+		'evictions',
+		'currsize',
+		'maxsize',
+))
+
+
+class LRUCache:
+	""" bounded least-recently-used cache with hit, miss and eviction statistics """
+
+	def __init__(self, maxsize):
+		""" constructor of LRU cache.
+
+		Parameter:
+			maxsize - maximum number of entries to keep
+		"""
+		self.maxsize = max(1, int(maxsize))
+		self.entries = collections.OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.lck = threading.Lock()
+
+	def get(self, k, compute_func):
+		""" get the cached value of given key.
+
+		Parameter:
+			k - the key to look up
+			compute_func - function invoked with the key to compute the value on cache miss
+		Return:
+			the cached or computed value
+		"""
+		with self.lck:
+			try:
+				v = self.entries[k]
+				self.entries.move_to_end(k)
+				self.hits = self.hits + 1
+				return v
+			except KeyError:
+				self.misses = self.misses + 1
+		v = compute_func(k)
+		with self.lck:
+			self.entries[k] = v
+			while len(self.entries) > self.maxsize:
+				self.entries.popitem(last=False)
+				self.evictions = self.evictions + 1
+		return v
+
+	def clear(self):
+		""" drop all entries and reset statistics """
+		with self.lck:
+			self.entries.clear()
+			self.hits = 0
+			self.misses = 0
+			self.evictions = 0
+
+	def info(self):
+		""" get statistics of the cache as CacheInfo named tuple """
+		with self.lck:
+			return CacheInfo(self.hits, self.misses, self.evictions, len(self.entries), self.maxsize)
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __reduce__(self):
+		# cached entries are not carried across processes, only the capacity
+		return (LRUCache, (self.maxsize, ))
+
+
+class MonthDayRule(CronRule):
+	""" base of rules which acceptance only depends on the day within the month
+
+	The accepted days of each month are computed once and kept in a bounded LRU cache keyed by (year, month).
+	"""
+
 	def __init__(self):
-		""" constructor of last day of month check rule.
+		self._month_cache = LRUCache(_MONTH_CACHE_SIZE)
+
+	def _compute_day_mask_of_key(self, k):
+		return self.compute_day_mask(k[0], k[1])
+
+	def compute_day_mask(self, year, month):  # pylint: disable=unused-argument
+		""" compute the accepted days of given month.
+
+		Parameter:
+			year, month - the month to compute
+		Return:
+			bitmask of accepted days (bit N set if day N is accepted)
+		"""
+		return 0
+
+	def day_mask_of_month(self, year, month):
+		""" get the (cached) bitmask of accepted days in given month.
+
+		Parameter:
+			year, month - the month to look up
+		Return:
+			bitmask of accepted days (bit N set if day N is accepted)
 		"""
-		pass
+		return self._month_cache.get((year, month), self._compute_day_mask_of_key)
 
 	def is_accept(self, d):
 		""" test is the given datetime object d complied with the rule set in this object.
@@ -68,10 +187,12 @@ class LastDayOfMonthValue(CronRule):
 		Return:
 			True if given object is complied, False otherwise.
 		"""
-		aux = d + datetime.timedelta(days=1)
-		if aux.day == 1:
-			return True
-		return False
+		return ((self._month_cache.get((d.year, d.month), self._compute_day_mask_of_key) >> d.day) & 1) == 1
+
+
+class LastDayOfMonthValue(MonthDayRule):
+	def compute_day_mask(self, year, month):
+		return 1 << calendar.monthrange(year, month)[1]
 
 	def __repr__(self):
 		return "%s.LastDayOfMonthValue()" % (self.__module__, )
@@ -80,49 +201,36 @@ class LastDayOfMonthValue(CronRule):
 _cached_last_day_of_month = LastDayOfMonthValue()
 
 
-class NearestWorkDayValue(CronRule):
+class NearestWorkDayValue(MonthDayRule):
 	def __init__(self, v):
 		""" constructor of nearest work day of month check rule.
 		"""
+		super().__init__()
 		self.exp_workday = int(v)
-		self.__cached_accept_date = None
-		self.__cached_reject_date = None
-
-	def is_accept(self, d):
-		""" test is the given datetime object d complied with the rule set in this object.
 
-		Parameter:
-			d - the datetime object to check
-		Return:
-			True if given object is complied, False otherwise.
-		"""
+	def _is_accept_date(self, d):
 		d_wd = d.isoweekday()
-		d_date = d.date()
-		if d_date == self.__cached_accept_date:
-			return True
-		if d_date == self.__cached_reject_date:
-			return False
-		result = False
 		if d_wd in (6, 7):
-			result = False
-		else:
-			if self.exp_workday == d.day:
-				result = True
-			elif d_wd == 1:
-				if (self.exp_workday == (d.day - 1)) or ((self.exp_workday == 1) and (d.day == 3)):
-					result = True
-			elif d_wd == 5:
-				if (self.exp_workday == (d.day + 1)):
-					result = True
-				else:
-					aux = d + datetime.timedelta(days=3)
-					if (self.exp_workday == (d.day + 2)) and (aux.day == 1):
-						result = True
-		if result:
-			self.__cached_accept_date = d_date
-		else:
-			self.__cached_reject_date = d_date
-		return result
+			return False
+		if self.exp_workday == d.day:
+			return True
+		if d_wd == 1:
+			if (self.exp_workday == (d.day - 1)) or ((self.exp_workday == 1) and (d.day == 3)):
+				return True
+		elif d_wd == 5:
+			if self.exp_workday == (d.day + 1):
+				return True
+			aux = d + datetime.timedelta(days=3)
+			if (self.exp_workday == (d.day + 2)) and (aux.day == 1):
+				return True
+		return False
+
+	def compute_day_mask(self, year, month):
+		mask = 0
+		for day in range(1, calendar.monthrange(year, month)[1] + 1):
+			if self._is_accept_date(datetime.date(year, month, day)):
+				mask = mask | (1 << day)
+		return mask
 
 	def __repr__(self):
 		return "%s.NearestWorkDayValue(%d)" % (
@@ -131,27 +239,19 @@ class NearestWorkDayValue(CronRule):
 		)
 
 
-class LastWeekdayOfMonthValue(CronRule):
+class LastWeekdayOfMonthValue(MonthDayRule):
 	def __init__(self, v):
 		""" constructor of last week day of month check rule.
 		"""
+		super().__init__()
 		self.exp_weekday = int(v)
 		if self.exp_weekday == 0:
 			self.exp_weekday = 7
 
-	def is_accept(self, d):
-		""" test is the given datetime object d complied with the rule set in this object.
-
-		Parameter:
-			d - the datetime object to check
-		Return:
-			True if given object is complied, False otherwise.
-		"""
-		if d.isoweekday() == self.exp_weekday:
-			aux = d + datetime.timedelta(days=7)
-			if aux.month != d.month:
-				return True
-		return False
+	def compute_day_mask(self, year, month):
+		last_day = calendar.monthrange(year, month)[1]
+		last_weekday = calendar.weekday(year, month, last_day) + 1
+		return 1 << (last_day - ((last_weekday - self.exp_weekday) % 7))
 
 	def __repr__(self):
 		return "%s.LastWeekdayOfMonthValue(%d)" % (
@@ -160,29 +260,22 @@ class LastWeekdayOfMonthValue(CronRule):
 		)
 
 
-class NthWeekdayOfMonthValue(CronRule):
+class NthWeekdayOfMonthValue(MonthDayRule):
 	def __init__(self, v, nth):
 		""" constructor of N-th week day of month check rule.
 		"""
+		super().__init__()
 		self.exp_weekday = int(v)
 		self.exp_nth = int(nth)
 		if self.exp_weekday == 0:
 			self.exp_weekday = 7
 
-	def is_accept(self, d):
-		""" test is the given datetime object d complied with the rule set in this object.
-
-		Parameter:
-			d - the datetime object to check
-		Return:
-			True if given object is complied, False otherwise.
-		"""
-		if d.isoweekday() == self.exp_weekday:
-			aux_0 = d - datetime.timedelta(days=(7 * self.exp_nth))
-			aux_1 = d - datetime.timedelta(days=(7 * (self.exp_nth - 1)))
-			if (aux_0.month != d.month) and (aux_1.month == d.month):
-				return True
-		return False
+	def compute_day_mask(self, year, month):
+		first_weekday, last_day = calendar.monthrange(year, month)
+		day = 1 + ((self.exp_weekday - (first_weekday + 1)) % 7) + 7 * (self.exp_nth - 1)
+		if 1 <= day <= last_day:
+			return 1 << day
+		return 0
 
 	def __repr__(self):
 		return "%s.NthWeekdayOfMonthValue(%d, %d)" % (
@@ -250,6 +343,32 @@ def parse_cronstring_minute(vL, vT=None, raise_error=False):
 	return ()
 
 
+def parse_cronstring_second(vL, vT=None, raise_error=False):
+	result = _parse_cronstring_common(vL, parse_cronstring_second, raise_error)
+	if result is not None:
+		return result
+	if vT is not None:
+		try:
+			bL, bR = _cast_boundary(vL, vT, 0, 60)
+			return [ScalarValue(velem, 'second') for velem in range(bL, bR)]
+		except Exception:
+			_log.error("Syntax Error: cannot convert one or both of range value (token=%r-%r)", vL, vT)
+			if raise_error:
+				raise
+		return ()
+	if vL == '*':
+		return parse_cronstring_second(0, 59)
+	try:
+		vv = int(vL)
+		if 0 <= vv <= 59:
+			return (ScalarValue(vv, 'second'), )
+	except Exception:
+		_log.error("Syntax Error: cannot convert value (token=%r)", vL)
+		if raise_error:
+			raise
+	return ()
+
+
 def parse_cronstring_hour(vL, vT=None, raise_error=False):
 	result = _parse_cronstring_common(vL, parse_cronstring_hour, raise_error)
 	if result is not None:
@@ -400,16 +519,7 @@ def __parse_cronstring_impl(rulestring, ruleparsefunc, raise_error):
 		return None
 
 
-def parse_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error=False):
-	""" parsing given cron-rule-string and result array of rule set
-
-	Parameter:
-		rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
-		raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
-	Return:
-		5 element tuple which consists rule set for minute, hour, day, month, weekday respectively
-		the element would be None if there is no restriction
-	"""
+def _parse_cronstring_uncached(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error):
 	rs_minute = __parse_cronstring_impl(rule_minute, parse_cronstring_minute, raise_error)
 	rs_hour = __parse_cronstring_impl(rule_hour, parse_cronstring_hour, raise_error)
 	rs_day = __parse_cronstring_impl(rule_day, parse_cronstring_day, raise_error)
@@ -424,15 +534,139 @@ def parse_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday,
 	)
 
 
+# parse cache, None when disabled (see enable_parse_cache)
+_parse_cache = None
+
+
+class _ParseCacheEntry:
+	""" (internal) cached parse result and the lazily compiled form of it """
+
+	__slots__ = (
+			'rulearray',
+			'compiled',
+	)
+
+	def __init__(self, rulearray):
+		self.rulearray = rulearray
+		self.compiled = None
+
+
+def _parse_cache_key(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error):
+	return (
+			str(rule_minute).strip(),
+			str(rule_hour).strip(),
+			str(rule_day).strip(),
+			str(rule_month).strip(),
+			str(rule_weekday).strip(),
+			bool(raise_error),
+	)
+
+
+def _compute_parse_cache_entry(k):
+	return _ParseCacheEntry(_parse_cronstring_uncached(k[0], k[1], k[2], k[3], k[4], k[5]))
+
+
+def enable_parse_cache(maxsize=256):
+	""" enable caching of parse_cronstring results
+
+	Cached rule arrays are shared between callers and must not be modified.
+
+	Parameter:
+		maxsize=256 - maximum number of distinct rules to keep
+	Return:
+		the LRUCache object of parse cache
+	"""
+	global _parse_cache  # pylint: disable=global-statement
+	_parse_cache = LRUCache(maxsize)
+	return _parse_cache
+
+
+def disable_parse_cache():
+	""" disable caching of parse_cronstring results and drop cached entries """
+	global _parse_cache  # pylint: disable=global-statement
+	_parse_cache = None
+
+
+def clear_parse_cache():
+	""" drop cached parse results and reset statistics of the parse cache if enabled """
+	cache = _parse_cache
+	if cache is not None:
+		cache.clear()
+
+
+def parse_cache_info():
+	""" get statistics of the parse cache
+
+	Return:
+		CacheInfo named tuple of (hits, misses, evictions, currsize, maxsize), or None if parse cache is disabled
+	"""
+	cache = _parse_cache
+	if cache is None:
+		return None
+	return cache.info()
+
+
+def parse_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error=False):
+	""" parsing given cron-rule-string and result array of rule set
+
+	Parameter:
+		rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
+		raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
+	Return:
+		5 element tuple which consists rule set for minute, hour, day, month, weekday respectively
+		the element would be None if there is no restriction
+	"""
+	cache = _parse_cache
+	if cache is None:
+		return _parse_cronstring_uncached(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
+	k = _parse_cache_key(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
+	return cache.get(k, _compute_parse_cache_entry).rulearray
+
+
+def parse_cronstring_with_second(rule_second, rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error=False):
+	""" parsing given six-field cron-rule-string (with leading second field) and result array of rule set
+
+	Six-field rule arrays are accepted by check_timestamp_by_rule, check_timestamps_by_rule, compile_rulearray,
+	iter_range_by_rule, iter_reverse_range_by_rule, filter_range_by_rule, count_range_by_rule, the parallel
+	range functions, next_fire_time, previous_fire_time and CronScheduler. The minute based mask_by_rule,
+	RuleTable, RuleIndex and TimingWheelScheduler raise ValueError for them.
+
+	Parameter:
+		rule_second, rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
+		raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
+	Return:
+		6 element tuple which consists rule set for second, minute, hour, day, month, weekday respectively
+		the element would be None if there is no restriction
+	"""
+	rs_second = __parse_cronstring_impl(rule_second, parse_cronstring_second, raise_error)
+	return (rs_second, ) + parse_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
+
+
+def _parse_compiled_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error):
+	""" (internal) parse and compile given cron-rule-string, the compiled rule array is kept in parse cache if enabled """
+	cache = _parse_cache
+	if cache is None:
+		return CompiledRuleArray(_parse_cronstring_uncached(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error))
+	k = _parse_cache_key(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
+	entry = cache.get(k, _compute_parse_cache_entry)
+	compiled = entry.compiled
+	if compiled is None:
+		compiled = CompiledRuleArray(entry.rulearray)
+		entry.compiled = compiled
+	return compiled
+
+
 def check_timestamp_by_rule(rulearray, tstamp):
 	""" check if given time-stamp is comply to the given rule array
 
 	Parameter:
-		rulearray - rule array generated by parse_cronstring
+		rulearray - rule array generated by parse_cronstring, or compiled rule array from compile_rulearray
 		tstamp - time-stamp to be check
 	Return:
 		True if given time-stamp complied, False otherwise
 	"""
+	if isinstance(rulearray, (CompiledRuleArray, CompiledSecondRuleArray, CronSchedule)):
+		return rulearray.is_accept(tstamp)
 	complied = 0
 	# {{{ check if timestamp is accept by rule array
 	for rset in rulearray:
@@ -449,44 +683,2467 @@ def check_timestamp_by_rule(rulearray, tstamp):
 		if is_complied:
 			complied = complied + 1
 	# }}} check if timestamp is accept by rule array
-	if complied == 5:  # all rules are conquered
+	if complied == len(rulearray):  # all rules are conquered
 		return True
 	return False
 
 
-def filter_range_by_rule(rulearray, tstamp_start, tstamp_end):
-	""" filter time-stamps within given range by given rule array
+# the Gregorian calendar (including the weekday of dates) repeats itself every 400 years
+_CALENDAR_CYCLE_YEARS = 400
+
+
+def _compile_rule_set(rset, fieldname, lower_bound, upper_bound):
+	""" (internal) split rule set of a field into bitmask of accepted values and the remaining rule objects
 
 	Parameter:
-		rulearray - rule array generated by parse_cronstring
-		tstamp_start - range start (inclusive)
-		tstamp_end - range end (exclusive)
+		rset - rule set of the field (None for no restriction)
+		fieldname - the datetime component of the field
+		lower_bound, upper_bound - range of field value (upper bound exclusive)
 	Return:
-		list of datetime object which complies to given rule array
+		2 element tuple of bitmask (bit N set if value N is accepted) and tuple of rule objects which cannot be
+		expressed as bitmask
 	"""
-	increment_delta = datetime.timedelta(minutes=1)
-	d = datetime.datetime(tstamp_start.year, tstamp_start.month, tstamp_start.day, tstamp_start.hour, tstamp_start.minute)
+	if rset is None:
+		return (((1 << upper_bound) - 1) ^ ((1 << lower_bound) - 1), ())
+	mask = 0
+	rules = []
+	for robj in rset:
+		if isinstance(robj, ScalarValue) and (robj.fieldname == fieldname):
+			v = robj.v
+			if (fieldname == 'weekday') and (v == 0):
+				v = 7  # ISO calendar
+			if lower_bound <= v < upper_bound:
+				mask = mask | (1 << v)
+		else:
+			rules.append(robj)
+	return (mask, tuple(rules))
+
+
+def _mask_to_values(mask, lower_bound, upper_bound):
+	mask = mask & (((1 << upper_bound) - 1) ^ ((1 << lower_bound) - 1))
 	result = []
-	while d < tstamp_end:
-		if check_timestamp_by_rule(rulearray, d):
-			result.append(d)
-		d = d + increment_delta
-	return result
+	while mask:
+		lowest_bit = mask & -mask
+		result.append(lowest_bit.bit_length() - 1)
+		mask = mask ^ lowest_bit
+	return tuple(result)
+
+
+def _is_date_rules(rules):
+	""" (internal) check if given rule objects of day or weekday field only depend on the date part of time-stamp """
+	for robj in rules:
+		if isinstance(robj, ScalarValue):
+			if robj.fieldname not in ('day', 'month', 'weekday'):
+				return False
+		elif not isinstance(robj, MonthDayRule):
+			return False
+	return True
 
 
-def get_datetime_by_cronrule(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, tstamp_start, tstamp_end, raise_error=False):
-	""" filter given time-stamp range with given rules
+def _is_any_rule_accept(rules, d):
+	for robj in rules:
+		if robj.is_accept(d):
+			return True
+	return False
+
+
+class CompiledRuleArray:
+	""" rule array compiled into per-field bitmasks of accepted values
+
+	Rule objects which cannot be expressed as bitmask (eg: L, W, nL and n#k rules) are kept in the
+	*_rules attributes and only checked when present.
+	"""
+
+	__slots__ = (
+			'minute_mask',
+			'hour_mask',
+			'day_mask',
+			'month_mask',
+			'weekday_mask',
+			'minute_rules',
+			'hour_rules',
+			'day_rules',
+			'month_rules',
+			'weekday_rules',
+			'minute_values',
+			'hour_values',
+			'month_values',
+			'minute_of_day_values',
+			'minute_of_day_deltas',
+			'second_of_day_values',
+			'is_field_skippable',
+	)
+
+	def __init__(self, rulearray):
+		""" constructor of compiled rule array.
+
+		Parameter:
+			rulearray - rule array generated by parse_cronstring
+		"""
+		self.minute_mask, self.minute_rules = _compile_rule_set(rulearray[0], 'minute', 0, 60)
+		self.hour_mask, self.hour_rules = _compile_rule_set(rulearray[1], 'hour', 0, 24)
+		self.day_mask, self.day_rules = _compile_rule_set(rulearray[2], 'day', 1, 32)
+		self.month_mask, self.month_rules = _compile_rule_set(rulearray[3], 'month', 1, 13)
+		self.weekday_mask, self.weekday_rules = _compile_rule_set(rulearray[4], 'weekday', 1, 8)
+		self.minute_values = _mask_to_values(self.minute_mask, 0, 60)
+		self.hour_values = _mask_to_values(self.hour_mask, 0, 24)
+		self.month_values = _mask_to_values(self.month_mask, 1, 13)
+		# sorted minute-of-day template shared by every accepted day
+		self.minute_of_day_values = tuple([(h * 60 + m) for h in self.hour_values for m in self.minute_values])
+		self.minute_of_day_deltas = tuple([datetime.timedelta(minutes=v) for v in self.minute_of_day_values])
+		self.second_of_day_values = tuple([(v * 60) for v in self.minute_of_day_values])
+		# the field-skipping engine requires time-of-day and month fields to be fully expressed as bitmask
+		self.is_field_skippable = (not self.minute_rules) and (not self.hour_rules) and (not self.month_rules) and _is_date_rules(
+				self.day_rules) and _is_date_rules(self.weekday_rules)
+
+	def is_accept(self, d):
+		""" test is the given datetime object d complied with the rule array.
+
+		Parameter:
+			d - the datetime object to check
+		Return:
+			True if given object is complied, False otherwise.
+		"""
+		if (not ((self.minute_mask >> d.minute) & 1)) and ((not self.minute_rules) or (not _is_any_rule_accept(self.minute_rules, d))):
+			return False
+		if (not ((self.hour_mask >> d.hour) & 1)) and ((not self.hour_rules) or (not _is_any_rule_accept(self.hour_rules, d))):
+			return False
+		if (not ((self.month_mask >> d.month) & 1)) and ((not self.month_rules) or (not _is_any_rule_accept(self.month_rules, d))):
+			return False
+		if (not ((self.day_mask >> d.day) & 1)) and ((not self.day_rules) or (not _is_any_rule_accept(self.day_rules, d))):
+			return False
+		if (not ((self.weekday_mask >> d.isoweekday()) & 1)) and ((not self.weekday_rules) or (not _is_any_rule_accept(self.weekday_rules, d))):
+			return False
+		return True
+
+	def __repr__(self):
+		return "%s.CompiledRuleArray(minute=0x%X, hour=0x%X, day=0x%X, month=0x%X, weekday=0x%X, day_rules=%r, weekday_rules=%r)" % (
+				self.__module__,
+				self.minute_mask,
+				self.hour_mask,
+				self.day_mask,
+				self.month_mask,
+				self.weekday_mask,
+				self.day_rules,
+				self.weekday_rules,
+		)
+
+
+class CompiledSecondRuleArray:
+	""" six-field rule array compiled into bitmask of accepted seconds and compiled rule array of the other fields
+
+	The accepted seconds form a sorted second-of-minute template which is emitted for every minute the
+	remaining five fields accept, so seconds are skipped like any other field.
+	"""
+
+	__slots__ = (
+			'second_mask',
+			'second_rules',
+			'second_values',
+			'second_deltas',
+			'minute_compiled',
+			'second_of_day_values',
+	)
+
+	def __init__(self, rulearray):
+		""" constructor of compiled six-field rule array.
+
+		Parameter:
+			rulearray - rule array generated by parse_cronstring_with_second
+		"""
+		self.second_mask, self.second_rules = _compile_rule_set(rulearray[0], 'second', 0, 60)
+		self.second_values = _mask_to_values(self.second_mask, 0, 60)
+		self.second_deltas = tuple([datetime.timedelta(seconds=v) for v in self.second_values])
+		self.minute_compiled = CompiledRuleArray(rulearray[1:])
+		self.second_of_day_values = tuple([(v + second) for v in self.minute_compiled.second_of_day_values for second in self.second_values])
+
+	def is_accept(self, d):
+		""" test is the given datetime object d complied with the rule array.
+
+		Parameter:
+			d - the datetime object to check
+		Return:
+			True if given object is complied, False otherwise.
+		"""
+		if (not ((self.second_mask >> d.second) & 1)) and ((not self.second_rules) or (not _is_any_rule_accept(self.second_rules, d))):
+			return False
+		return self.minute_compiled.is_accept(d)
+
+	def seconds_of_minute(self, minute_d):
+		""" get sorted timedelta offsets of accepted seconds within the minute which starts at given time-stamp """
+		if not self.second_rules:
+			return self.second_deltas
+		return tuple([datetime.timedelta(seconds=v) for v in range(60) if ((self.second_mask >> v) & 1) or _is_any_rule_accept(
+				self.second_rules, minute_d.replace(second=v))])
+
+	def __repr__(self):
+		return "%s.CompiledSecondRuleArray(second=0x%X, %r)" % (
+				self.__module__,
+				self.second_mask,
+				self.minute_compiled,
+		)
+
+
+def compile_rulearray(rulearray):
+	""" compile rule array into per-field bitmasks
 
 	Parameter:
-		rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
-		tstamp_start - range start (inclusive)
-		tstamp_end - range end (exclusive)
-		raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second (compiled rule
+			array is returned as-is, and compiled rule array of CronSchedule object is returned for CronSchedule object)
 	Return:
-		list of datetime object which complies to given rule array
+		CompiledRuleArray (or CompiledSecondRuleArray for six-field rule array) object which can be used in place of rule array
+	"""
+	if isinstance(rulearray, (CompiledRuleArray, CompiledSecondRuleArray)):
+		return rulearray
+	if isinstance(rulearray, CronSchedule):
+		return rulearray.compiled
+	if len(rulearray) == 6:
+		return CompiledSecondRuleArray(rulearray)
+	return CompiledRuleArray(rulearray)
+
+
+def _reject_second_rulearray(compiled, funcname):
+	""" (internal) raise ValueError for six-field rule array which given function only works per minute """
+	if isinstance(compiled, CompiledSecondRuleArray):
+		raise ValueError("%s() does not support rule array with second field" % (funcname, ))
+
+
+def _unit_seconds_of(compiled):
+	""" (internal) get resolution in seconds of given compiled rule array """
+	return 1 if isinstance(compiled, CompiledSecondRuleArray) else 60
+
+
+def _merge_month_day_rules(rules, year, month):
+	""" (internal) merge accepted days of month based rules into bitmask
+
+	Return:
+		2 element tuple of bitmask of accepted days and list of remaining rule objects
+	"""
+	mask = 0
+	remaining = []
+	for robj in rules:
+		if isinstance(robj, MonthDayRule):
+			mask = mask | robj.day_mask_of_month(year, month)
+		else:
+			remaining.append(robj)
+	return (mask, remaining)
+
+
+# bitmask of days K, K+7, K+14, ... within a month, indexed by K-1
+_WEEKLY_DAY_MASKS = tuple([sum([(1 << day) for day in range(k, 32, 7)]) for k in range(1, 8)])
+
+
+def _merge_remaining_day_rules(mask, rules, year, month, last_day):
+	""" (internal) add days accepted by rule objects which cannot give bitmask of accepted days """
+	for day in range(1, last_day + 1):
+		if (not ((mask >> day) & 1)) and _is_any_rule_accept(rules, datetime.datetime(year, month, day)):
+			mask = mask | (1 << day)
+	return mask
+
+
+def _accepted_day_mask_of_month(compiled, year, month):
+	""" (internal) get bitmask of days in given month which are accepted by the day and weekday rules """
+	first_weekday, last_day = calendar.monthrange(year, month)
+	day_mask = compiled.day_mask
+	if compiled.day_rules:
+		day_rule_mask, remaining_rules = _merge_month_day_rules(compiled.day_rules, year, month)
+		day_mask = day_mask | day_rule_mask
+		if remaining_rules:
+			day_mask = _merge_remaining_day_rules(day_mask, remaining_rules, year, month, last_day)
+	weekday_mask = compiled.weekday_mask
+	weekday_day_mask = 0
+	for weekday in range(1, 8):
+		if (weekday_mask >> weekday) & 1:
+			weekday_day_mask = weekday_day_mask | _WEEKLY_DAY_MASKS[(weekday - first_weekday - 1) % 7]
+	if compiled.weekday_rules:
+		weekday_rule_mask, remaining_rules = _merge_month_day_rules(compiled.weekday_rules, year, month)
+		weekday_day_mask = weekday_day_mask | weekday_rule_mask
+		if remaining_rules:
+			weekday_day_mask = _merge_remaining_day_rules(weekday_day_mask, remaining_rules, year, month, last_day)
+	return day_mask & weekday_day_mask & ((1 << (last_day + 1)) - 2)
+
+
+def _accepted_days_of_month(compiled, year, month):
+	""" (internal) list days of given month which are accepted by the day and weekday rules """
+	mask = _accepted_day_mask_of_month(compiled, year, month)
+	return [day for day in range(1, 32) if (mask >> day) & 1]
+
+
+def _count_bits(v):
+	return bin(v).count('1')
+
+
+def _truncate_to_minute(tstamp):
+	return datetime.datetime(tstamp.year, tstamp.month, tstamp.day, tstamp.hour, tstamp.minute)
+
+
+def _truncate_to_second(tstamp):
+	return tstamp.replace(microsecond=0, tzinfo=None)
+
+
+def _last_second_before(tstamp):
+	""" (internal) get the last second-aligned time-stamp which is earlier than given time-stamp """
+	d = _truncate_to_second(tstamp)
+	if d == tstamp:
+		d = d - datetime.timedelta(seconds=1)
+	return d
+
+
+def _last_minute_before(tstamp):
+	""" (internal) get the last minute-aligned time-stamp which is earlier than given time-stamp """
+	d = _truncate_to_minute(tstamp)
+	if d == tstamp:
+		d = d - datetime.timedelta(minutes=1)
+	return d
+
+
+def _scan_forward(rulearray, d, tstamp_end):
+	""" (internal) minute-by-minute scanning for rule arrays which field-skipping engine cannot handle """
+	increment_delta = datetime.timedelta(minutes=1)
+	year_horizon = d.year + _CALENDAR_CYCLE_YEARS
+	while d.year <= year_horizon:
+		if (tstamp_end is not None) and (d >= tstamp_end):
+			return
+		if check_timestamp_by_rule(rulearray, d):
+			yield d
+			year_horizon = d.year + _CALENDAR_CYCLE_YEARS
+		try:
+			d = d + increment_delta
+		except OverflowError:
+			return
+
+
+def _iter_forward(rulearray, tstamp_start, tstamp_end):
+	""" (internal) generate time-stamps comply to given rule array in ascending order
+
+	The search jumps to the next allowed month, then to the next accepted day. The sorted minute-of-day
+	template of the rule is emitted for every accepted day, so the cost scales with the number of matches
+	rather than the width of the range.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		tstamp_start - range start (inclusive, truncated to minute)
+		tstamp_end - range end (exclusive), None for open-ended search
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	compiled = compile_rulearray(rulearray)
+	if isinstance(compiled, CompiledSecondRuleArray):
+		yield from _iter_forward_second(compiled, tstamp_start, tstamp_end)
+		return
+	d = _truncate_to_minute(tstamp_start)
+	if not compiled.is_field_skippable:
+		for d in _scan_forward(compiled, d, tstamp_end):
+			yield d
+		return
+	template = compiled.minute_of_day_values
+	template_deltas = compiled.minute_of_day_deltas
+	months = compiled.month_values
+	if (not template) or (not months):
+		return
+	year, month, day, start_mod = d.year, d.month, d.day, d.hour * 60 + d.minute
+	year_horizon = year + _CALENDAR_CYCLE_YEARS
+	while (year <= datetime.MAXYEAR) and (year <= year_horizon):
+		if (tstamp_end is not None) and ((year, month) > (tstamp_end.year, tstamp_end.month)):
+			return
+		if (compiled.month_mask >> month) & 1:
+			for accepted_day in _accepted_days_of_month(compiled, year, month):
+				if accepted_day < day:
+					continue
+				idx = bisect.bisect_left(template, start_mod) if (accepted_day == day) else 0
+				if idx >= len(template):
+					continue
+				base = datetime.datetime(year, month, accepted_day)
+				for template_idx in range(idx, len(template_deltas)):
+					d = base + template_deltas[template_idx]
+					if (tstamp_end is not None) and (d >= tstamp_end):
+						return
+					yield d
+				year_horizon = year + _CALENDAR_CYCLE_YEARS
+		idx = bisect.bisect_right(months, month)
+		if idx < len(months):
+			month = months[idx]
+		else:
+			year = year + 1
+			month = months[0]
+		day, start_mod = 1, 0
+
+
+def _iter_forward_second(compiled, tstamp_start, tstamp_end):
+	""" (internal) generate time-stamps comply to given compiled six-field rule array in ascending order
+
+	Minutes are found by the minute-level engine and the second-of-minute template is emitted within each.
+	"""
+	tstamp_start = _truncate_to_second(tstamp_start)
+	if (not compiled.second_values) and (not compiled.second_rules):
+		return
+	for minute_d in _iter_forward(compiled.minute_compiled, tstamp_start, tstamp_end):
+		for second_delta in compiled.seconds_of_minute(minute_d):
+			d = minute_d + second_delta
+			if d < tstamp_start:
+				continue
+			if (tstamp_end is not None) and (d >= tstamp_end):
+				return
+			yield d
+
+
+# number of (time zone, year) UTC offset transition tables to keep
+_TZ_TRANSITION_CACHE_SIZE = 64
+
+_tz_transition_cache = LRUCache(_TZ_TRANSITION_CACHE_SIZE)
+
+
+class _TimeZoneYearTable:
+	""" (internal) UTC offset transitions of a time zone around a year
+
+	Each transition is a tuple of (wall time before transition, wall time after transition, UTC instant,
+	offset before, offset after). Transitions from one day before to one day after the year are included so
+	any wall time within the year can be resolved.
+	"""
+
+	__slots__ = (
+			'initial_offset',
+			'transitions',
+			'wall_befores',
+			'max_shift',
+	)
+
+	def __init__(self, initial_offset, transitions):
+		self.initial_offset = initial_offset
+		self.transitions = tuple(transitions)
+		self.wall_befores = [t[0] for t in transitions]
+		self.max_shift = max([abs(t[4] - t[3]) for t in transitions] + [datetime.timedelta(0)])
+
+
+def _resolve_tz(tz):
+	if isinstance(tz, str):
+		if zoneinfo is None:
+			raise ImportError("zoneinfo module is required to resolve time zone name %r" % (tz, ))
+		return zoneinfo.ZoneInfo(tz)
+	return tz
+
+
+def _utcoffset_at(tz, utc_d):
+	return utc_d.replace(tzinfo=datetime.timezone.utc).astimezone(tz).utcoffset()
+
+
+def _compute_tz_year_table(k):
+	""" (internal) probe UTC offset of the time zone day by day and bisect to the second of each change """
+	tz, year = k
+	one_day = datetime.timedelta(days=1)
+	utc_d = datetime.datetime(year, 1, 1) - one_day if (year > datetime.MINYEAR) else datetime.datetime(year, 1, 2)
+	utc_end = datetime.datetime(year + 1, 1, 2) if (year < datetime.MAXYEAR) else datetime.datetime(year, 12, 30)
+	offset = _utcoffset_at(tz, utc_d)
+	initial_offset = offset
+	transitions = []
+	while utc_d < utc_end:
+		utc_next = min(utc_d + one_day, utc_end)
+		next_offset = _utcoffset_at(tz, utc_next)
+		if next_offset != offset:
+			lo, hi = 0, int((utc_next - utc_d).total_seconds())
+			while hi - lo > 1:
+				mid = (lo + hi) // 2
+				if _utcoffset_at(tz, utc_d + datetime.timedelta(seconds=mid)) == offset:
+					lo = mid
+				else:
+					hi = mid
+			utc_t = utc_d + datetime.timedelta(seconds=hi)
+			transitions.append((utc_t + offset, utc_t + next_offset, utc_t, offset, next_offset))
+			offset = next_offset
+		utc_d = utc_next
+	return _TimeZoneYearTable(initial_offset, transitions)
+
+
+def _tz_year_table(tz, year):
+	return _tz_transition_cache.get((tz, year), _compute_tz_year_table)
+
+
+def _to_utc_and_wall(tstamp, tz):
+	""" (internal) get naive UTC instant and naive wall time in given time zone of time-stamp, naive time-stamp is taken as wall time of the zone """
+	if tstamp.tzinfo is None:
+		tstamp = tstamp.replace(tzinfo=tz)
+	return (tstamp.astimezone(datetime.timezone.utc).replace(tzinfo=None), tstamp.astimezone(tz).replace(tzinfo=None, fold=0))
+
+
+def _resolve_wall(table, idx, w, tz):
+	""" (internal) resolve wall time into naive UTC instant and aware datetime object with given transition index of year table
+
+	Wall times skipped by a gap resolve to the transition, repeated wall times of a fold resolve to the first
+	occurrence, so the resolved instants never decrease as wall time increases.
+	"""
+	if idx < 0:
+		return (w - table.initial_offset, w.replace(tzinfo=tz))
+	_wall_before, wall_after, utc_t, _offset_before, offset_after = table.transitions[idx]
+	if w < wall_after:
+		# skipped wall time of a gap, fire at the transition
+		return (utc_t, wall_after.replace(tzinfo=tz))
+	return (w - offset_after, w.replace(tzinfo=tz))
+
+
+def _iter_forward_tz(rulearray, tstamp_start, tstamp_end, tz):
+	""" (internal) generate fires of given rule array evaluated in wall time of given time zone in ascending order
+
+	Wall times are generated by the naive engine and resolved through the cached transition table of the
+	zone. Wall times skipped by a gap fire once at the transition, repeated wall times of a fold fire once
+	at the first occurrence.
+
+	Return:
+		generator of 2 element tuple of naive UTC instant and aware datetime object
+	"""
+	compiled = compile_rulearray(rulearray)
+	truncate_func = _truncate_to_second if isinstance(compiled, CompiledSecondRuleArray) else _truncate_to_minute
+	start_utc, start_wall = _to_utc_and_wall(tstamp_start, tz)
+	truncated_wall = truncate_func(start_wall)
+	start_utc = start_utc - (start_wall - truncated_wall)
+	# walls skipped by a gap right before the start resolve to instants within the range
+	wall_lo = truncated_wall - _tz_year_table(tz, truncated_wall.year).max_shift
+	end_utc = None
+	wall_hi = None
+	if tstamp_end is not None:
+		end_utc, end_wall = _to_utc_and_wall(tstamp_end, tz)
+		# first occurrences of repeated walls after the end wall may still be before the end
+		wall_hi = end_wall + _tz_year_table(tz, end_wall.year).max_shift
+	last_utc = None
+	table_year = None
+	for w in _iter_forward(compiled, wall_lo, wall_hi):
+		if w.year != table_year:
+			table_year = w.year
+			table = _tz_year_table(tz, table_year)
+			wall_befores = table.wall_befores
+			idx = bisect.bisect_right(wall_befores, w) - 1
+		while (idx + 1 < len(wall_befores)) and (w >= wall_befores[idx + 1]):
+			idx = idx + 1
+		utc_d, aware_d = _resolve_wall(table, idx, w, tz)
+		if (utc_d < start_utc) or (utc_d == last_utc):
+			continue
+		if (end_utc is not None) and (utc_d >= end_utc):
+			return
+		last_utc = utc_d
+		yield (utc_d, aware_d)
+
+
+def _iter_backward_tz(rulearray, tstamp_start, tstamp_end, tz):
+	""" (internal) generate fires of given rule array evaluated in wall time of given time zone in descending order
+
+	Daylight saving time transitions are resolved the same way as _iter_forward_tz does.
+
+	Return:
+		generator of 2 element tuple of naive UTC instant and aware datetime object
+	"""
+	compiled = compile_rulearray(rulearray)
+	end_utc, end_wall = _to_utc_and_wall(tstamp_end, tz)
+	# first occurrences of repeated walls after the end wall may still be before the end
+	wall_hi = end_wall + _tz_year_table(tz, end_wall.year).max_shift
+	start_utc = None
+	wall_lo = None
+	if tstamp_start is not None:
+		truncate_func = _truncate_to_second if isinstance(compiled, CompiledSecondRuleArray) else _truncate_to_minute
+		start_utc, start_wall = _to_utc_and_wall(tstamp_start, tz)
+		truncated_wall = truncate_func(start_wall)
+		start_utc = start_utc - (start_wall - truncated_wall)
+		# walls skipped by a gap right before the start resolve to instants within the range
+		wall_lo = truncated_wall - _tz_year_table(tz, truncated_wall.year).max_shift
+	last_utc = None
+	for w in _iter_backward(compiled, wall_lo, wall_hi):
+		table = _tz_year_table(tz, w.year)
+		utc_d, aware_d = _resolve_wall(table, bisect.bisect_right(table.wall_befores, w) - 1, w, tz)
+		if (utc_d >= end_utc) or (utc_d == last_utc):
+			continue
+		if (start_utc is not None) and (utc_d < start_utc):
+			return
+		last_utc = utc_d
+		yield (utc_d, aware_d)
+
+
+def next_fire_time(rulearray, after, tz=None):
+	""" find the first time-stamp after given time-stamp which complies to given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		after - the time-stamp to search from (exclusive)
+		tz=None - time zone (tzinfo object or IANA zone name) to evaluate the rule in, see iter_range_by_rule
+	Return:
+		datetime object of the next fire time, or None if the rule array cannot be fulfilled
+	"""
+	compiled = compile_rulearray(rulearray)
+	if tz is not None:
+		tz = _resolve_tz(tz)
+		after_utc = _to_utc_and_wall(after, tz)[0]
+		for utc_d, aware_d in _iter_forward_tz(compiled, after, None, tz):
+			if utc_d > after_utc:
+				return aware_d
+		return None
+	try:
+		if isinstance(compiled, CompiledSecondRuleArray):
+			tstamp_start = _truncate_to_second(after) + datetime.timedelta(seconds=1)
+		else:
+			tstamp_start = _truncate_to_minute(after) + datetime.timedelta(minutes=1)
+	except OverflowError:
+		return None
+	for d in _iter_forward(compiled, tstamp_start, None):
+		return d
+	return None
+
+
+def _scan_backward(rulearray, d, tstamp_start):
+	""" (internal) minute-by-minute backward scanning for rule arrays which field-skipping engine cannot handle """
+	decrement_delta = datetime.timedelta(minutes=1)
+	year_horizon = d.year - _CALENDAR_CYCLE_YEARS
+	while d.year >= year_horizon:
+		if (tstamp_start is not None) and (d < tstamp_start):
+			return
+		if check_timestamp_by_rule(rulearray, d):
+			yield d
+			year_horizon = d.year - _CALENDAR_CYCLE_YEARS
+		try:
+			d = d - decrement_delta
+		except OverflowError:
+			return
+
+
+def _iter_backward(rulearray, tstamp_start, tstamp_end):
+	""" (internal) generate time-stamps comply to given rule array in descending order
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		tstamp_start - range start (inclusive, truncated to minute), None for open-ended search
+		tstamp_end - range end (exclusive)
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	compiled = compile_rulearray(rulearray)
+	if isinstance(compiled, CompiledSecondRuleArray):
+		yield from _iter_backward_second(compiled, tstamp_start, tstamp_end)
+		return
+	if tstamp_start is not None:
+		tstamp_start = _truncate_to_minute(tstamp_start)
+	try:
+		d = _last_minute_before(tstamp_end)
+	except OverflowError:
+		return
+	if not compiled.is_field_skippable:
+		for d in _scan_backward(compiled, d, tstamp_start):
+			yield d
+		return
+	template = compiled.minute_of_day_values
+	template_deltas = compiled.minute_of_day_deltas
+	months = compiled.month_values
+	if (not template) or (not months):
+		return
+	year, month, day, end_mod = d.year, d.month, d.day, d.hour * 60 + d.minute
+	year_horizon = year - _CALENDAR_CYCLE_YEARS
+	while (year >= datetime.MINYEAR) and (year >= year_horizon):
+		if (tstamp_start is not None) and ((year, month) < (tstamp_start.year, tstamp_start.month)):
+			return
+		if (compiled.month_mask >> month) & 1:
+			for accepted_day in reversed(_accepted_days_of_month(compiled, year, month)):
+				if accepted_day > day:
+					continue
+				idx = bisect.bisect_right(template, end_mod) if (accepted_day == day) else len(template)
+				if idx <= 0:
+					continue
+				base = datetime.datetime(year, month, accepted_day)
+				for template_idx in range(idx - 1, -1, -1):
+					d = base + template_deltas[template_idx]
+					if (tstamp_start is not None) and (d < tstamp_start):
+						return
+					yield d
+				year_horizon = year - _CALENDAR_CYCLE_YEARS
+		idx = bisect.bisect_left(months, month)
+		if idx > 0:
+			month = months[idx - 1]
+		else:
+			year = year - 1
+			month = months[-1]
+		day, end_mod = 31, 1439
+
+
+def _iter_backward_second(compiled, tstamp_start, tstamp_end):
+	""" (internal) generate time-stamps comply to given compiled six-field rule array in descending order """
+	if tstamp_start is not None:
+		tstamp_start = _truncate_to_second(tstamp_start)
+	try:
+		last_d = _last_second_before(tstamp_end)
+	except OverflowError:
+		return
+	if (not compiled.second_values) and (not compiled.second_rules):
+		return
+	minute_start = None if (tstamp_start is None) else _truncate_to_minute(tstamp_start)
+	for minute_d in _iter_backward(compiled.minute_compiled, minute_start, _truncate_to_minute(last_d) + datetime.timedelta(minutes=1)):
+		for second_delta in reversed(compiled.seconds_of_minute(minute_d)):
+			d = minute_d + second_delta
+			if d > last_d:
+				continue
+			if (tstamp_start is not None) and (d < tstamp_start):
+				return
+			yield d
+
+
+def previous_fire_time(rulearray, before, tz=None):
+	""" find the last time-stamp before given time-stamp which complies to given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		before - the time-stamp to search from (exclusive)
+		tz=None - time zone (tzinfo object or IANA zone name) to evaluate the rule in, see iter_range_by_rule
+	Return:
+		datetime object of the previous fire time, or None if the rule array cannot be fulfilled
+	"""
+	for d in iter_reverse_range_by_rule(rulearray, None, before, tz):
+		return d
+	return None
+
+
+def iter_reverse_range_by_rule(rulearray, tstamp_start, tstamp_end, tz=None):
+	""" lazily generate time-stamps within given range by given rule array in descending order
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		tstamp_start - range start (inclusive), None for no lower limit
+		tstamp_end - range end (exclusive)
+		tz=None - time zone (tzinfo object or IANA zone name) to evaluate the rule in, see iter_range_by_rule
+	Return:
+		generator of datetime object which complies to given rule array, latest first
+	"""
+	if tz is not None:
+		return (aware_d for _utc_d, aware_d in _iter_backward_tz(rulearray, tstamp_start, tstamp_end, _resolve_tz(tz)))
+	return _iter_backward(rulearray, tstamp_start, tstamp_end)
+
+
+def iter_range_by_rule(rulearray, tstamp_start, tstamp_end=None, tz=None):
+	""" lazily generate time-stamps within given range by given rule array
+
+	When time zone is given, the rule is evaluated in wall time of the zone and aware datetime objects are
+	generated (naive range boundaries are taken as wall time of the zone). Across daylight saving time
+	transitions:
+		- wall times skipped by a gap (spring forward) fire once, at the instant of the transition;
+		- wall times repeated by a fold (fall back) fire once, at their first occurrence.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		tstamp_start - range start (inclusive)
+		tstamp_end=None - range end (exclusive), None for open-ended range
+		tz=None - time zone as tzinfo object or IANA zone name (resolved by zoneinfo), None for naive evaluation
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	if tz is not None:
+		return (aware_d for _utc_d, aware_d in _iter_forward_tz(rulearray, tstamp_start, tstamp_end, _resolve_tz(tz)))
+	return _iter_forward(rulearray, tstamp_start, tstamp_end)
+
+
+_range_worker_compiled = None
+
+
+def _init_range_worker(compiled):
+	""" (internal) initializer of process pool worker, keep the compiled rule array for all chunks of the worker """
+	global _range_worker_compiled  # pylint: disable=global-statement
+	_range_worker_compiled = compiled
+
+
+def _expand_range_chunk(chunk):
+	""" (internal) expand one chunk of range in process pool worker
+
+	The chunk is a tuple of (compiled rule array, chunk start, chunk end), the compiled rule array is None when
+	it was shipped to the worker by the pool initializer. Time-stamps are sent back as offsets from the chunk
+	start in units of the rule resolution (minute, or second for six-field rule array) in a compact array,
+	which is far cheaper to pickle than datetime objects.
+	"""
+	compiled, chunk_start, chunk_end = chunk
+	if compiled is None:
+		compiled = _range_worker_compiled
+	unit_seconds = _unit_seconds_of(compiled)
+	base_epoch = _datetime_to_epoch(chunk_start)
+	offsets = array.array('q')
+	for d in _iter_forward(compiled, chunk_start, chunk_end):
+		offsets.append((_datetime_to_epoch(d) - base_epoch) // unit_seconds)
+	return offsets
+
+
+def _split_range_by_months(tstamp_start, tstamp_end, months_per_chunk):
+	""" (internal) split given range into chunks which boundaries are aligned to the first day of month """
+	result = []
+	months_per_chunk = max(1, int(months_per_chunk))
+	chunk_start = tstamp_start
+	month_number = tstamp_start.year * 12 + tstamp_start.month - 1
+	while chunk_start < tstamp_end:
+		month_number = month_number + months_per_chunk
+		try:
+			chunk_end = min(datetime.datetime(month_number // 12, month_number % 12 + 1, 1), tstamp_end)
+		except ValueError:
+			chunk_end = tstamp_end
+		result.append((chunk_start, chunk_end))
+		chunk_start = chunk_end
+	return result
+
+
+def iter_range_by_rule_parallel(rulearray, tstamp_start, tstamp_end, max_workers=None, months_per_chunk=12):
+	""" generate time-stamps within given range by given rule array, expanding month-aligned chunks in process pool
+
+	The rule array is compiled once and shipped to each worker process by the pool initializer (along with
+	each chunk on Python 3.6, which has no pool initializer). Chunks are expanded concurrently and time-stamps
+	are generated in order. At most max_workers + 1 chunks are submitted ahead of the chunk being generated,
+	so expanded but unread chunks do not pile up in memory, and closing the generator early only waits for
+	those chunks. Building the datetime objects of the result
+	still happens in the calling process, so this pays off for sparse results or rules with costly acceptance
+	checks rather than for rules which fire every minute.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, compiled rule array or CronSchedule object
+		tstamp_start - range start (inclusive)
+		tstamp_end - range end (exclusive)
+		max_workers=None - number of worker processes, number of processors if None
+		months_per_chunk=12 - number of months in each chunk
+	Return:
+		generator of datetime object which complies to given rule array
+	"""
+	compiled = compile_rulearray(rulearray)
+	unit_seconds = _unit_seconds_of(compiled)
+	truncate_func = _truncate_to_second if (unit_seconds == 1) else _truncate_to_minute
+	chunks = _split_range_by_months(truncate_func(tstamp_start), tstamp_end, months_per_chunk)
+	if not chunks:
+		return
+	import concurrent.futures  # pylint: disable=import-outside-toplevel
+	if max_workers is None:
+		max_workers = os.cpu_count() or 1
+	if sys.version_info >= (3, 7):
+		executor = concurrent.futures.ProcessPoolExecutor(max_workers, initializer=_init_range_worker, initargs=(compiled, ))
+		chunk_compiled = None
+	else:
+		executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+		chunk_compiled = compiled
+	remaining_chunks = iter(chunks)
+	pending = collections.deque()
+
+	def submit_chunks(count):
+		for chunk_start, chunk_end in itertools.islice(remaining_chunks, count):
+			pending.append((chunk_start, executor.submit(_expand_range_chunk, (chunk_compiled, chunk_start, chunk_end))))
+
+	try:
+		submit_chunks(max_workers + 1)
+		unit_delta = datetime.timedelta(seconds=unit_seconds)
+		while pending:
+			chunk_start, future = pending.popleft()
+			offsets = future.result()
+			submit_chunks(1)
+			for offset in offsets:
+				yield chunk_start + unit_delta * offset
+	finally:
+		# chunks in flight are left to finish rather than cancelled, shutdown of Python 3.7 process pool may hang
+		# when only cancelled calls are left, and at most max_workers + 1 chunks are in flight anyway
+		executor.shutdown(wait=True)
+
+
+def filter_range_by_rule_parallel(rulearray, tstamp_start, tstamp_end, max_workers=None, months_per_chunk=12):
+	""" get list of time-stamps within given range by given rule array with process pool
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, compiled rule array or CronSchedule object
+		tstamp_start - range start (inclusive)
+		tstamp_end - range end (exclusive)
+		max_workers=None - number of worker processes, number of processors if None
+		months_per_chunk=12 - number of months in each chunk
+	Return:
+		list of datetime object which complies to given rule array
+	"""
+	return list(iter_range_by_rule_parallel(rulearray, tstamp_start, tstamp_end, max_workers, months_per_chunk))
+
+
+def check_timestamps_by_rule(rulearray, tstamps, accepted_only=False):
+	""" check every time-stamp of given iterable against given rule array
+
+	The day-level verdict (day, weekday, L, W, nL and n#k rules) is computed once per month within the batch.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		tstamps - iterable of time-stamps to be check, need not to be sorted
+		accepted_only=False - return the complied time-stamps instead of list of check result
+	Return:
+		list of True/False for each given time-stamp, or list of complied time-stamps if accepted_only is set
+	"""
+	compiled = compile_rulearray(rulearray)
+	if isinstance(compiled, CompiledSecondRuleArray):
+		tstamps = list(tstamps)
+		minute_result = check_timestamps_by_rule(compiled.minute_compiled, tstamps)
+		second_mask = compiled.second_mask
+		second_rules = compiled.second_rules
+		result = []
+		for tstamp, is_complied in zip(tstamps, minute_result):
+			is_complied = is_complied and (((second_mask >> tstamp.second) & 1) or (second_rules and _is_any_rule_accept(second_rules, tstamp)))
+			if not accepted_only:
+				result.append(bool(is_complied))
+			elif is_complied:
+				result.append(tstamp)
+		return result
+	result = []
+	if not compiled.is_field_skippable:
+		for tstamp in tstamps:
+			is_complied = compiled.is_accept(tstamp)
+			if not accepted_only:
+				result.append(is_complied)
+			elif is_complied:
+				result.append(tstamp)
+		return result
+	minute_mask = compiled.minute_mask
+	hour_mask = compiled.hour_mask
+	month_mask = compiled.month_mask
+	day_masks = {}
+	for tstamp in tstamps:
+		is_complied = False
+		if ((minute_mask >> tstamp.minute) & 1) and ((hour_mask >> tstamp.hour) & 1) and ((month_mask >> tstamp.month) & 1):
+			k = (tstamp.year, tstamp.month)
+			day_mask = day_masks.get(k)
+			if day_mask is None:
+				day_mask = _accepted_day_mask_of_month(compiled, tstamp.year, tstamp.month)
+				day_masks[k] = day_mask
+			is_complied = ((day_mask >> tstamp.day) & 1) == 1
+		if not accepted_only:
+			result.append(is_complied)
+		elif is_complied:
+			result.append(tstamp)
+	return result
+
+
+def _count_template_before(template, tstamp):
+	""" (internal) count minute-of-day template values earlier than the time-of-day of given time-stamp """
+	mod = tstamp.hour * 60 + tstamp.minute
+	if (tstamp.second == 0) and (tstamp.microsecond == 0):
+		return bisect.bisect_left(template, mod)
+	return bisect.bisect_right(template, mod)
+
+
+def _count_second_range(compiled, tstamp_start, tstamp_end):
+	""" (internal) count fires of six-field rule array by template slices of accepted days """
+	minute_compiled, template = _epoch_engine_parts(compiled)
+	if template is None:
+		result = 0
+		for _d in _iter_forward(compiled, tstamp_start, tstamp_end):
+			result = result + 1
+		return result
+	local_start = _datetime_to_epoch(tstamp_start)
+	local_end = _datetime_to_epoch(tstamp_end) + (1 if tstamp_end.microsecond else 0)
+	if local_start >= local_end:
+		return 0
+	result = 0
+	for _base, lower_idx, upper_idx in _iter_epoch_day_runs(minute_compiled, template, local_start, local_end):
+		result = result + upper_idx - lower_idx
+	return result
+
+
+def count_range_by_rule(rulearray, tstamp_start, tstamp_end):
+	""" count time-stamps within given range which comply to given rule array without enumerating them
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		tstamp_start - range start (inclusive)
+		tstamp_end - range end (exclusive)
+	Return:
+		number of time-stamps which comply to given rule array
+	"""
+	compiled = compile_rulearray(rulearray)
+	if isinstance(compiled, CompiledSecondRuleArray):
+		return _count_second_range(compiled, tstamp_start, tstamp_end)
+	if not compiled.is_field_skippable:
+		result = 0
+		for _d in _scan_forward(compiled, _truncate_to_minute(tstamp_start), tstamp_end):
+			result = result + 1
+		return result
+	tstamp_start = _truncate_to_minute(tstamp_start)
+	if tstamp_start >= tstamp_end:
+		return 0
+	template = compiled.minute_of_day_values
+	template_size = len(template)
+	if not template_size:
+		return 0
+	start_key = (tstamp_start.year, tstamp_start.month)
+	end_key = (tstamp_end.year, tstamp_end.month)
+	result = 0
+	year, month = start_key
+	while (year, month) <= end_key:
+		if (compiled.month_mask >> month) & 1:
+			mask = _accepted_day_mask_of_month(compiled, year, month)
+			if (year, month) == start_key:
+				if (mask >> tstamp_start.day) & 1:
+					if tstamp_start.date() == tstamp_end.date():
+						return _count_template_before(template, tstamp_end) - bisect.bisect_left(template, tstamp_start.hour * 60 + tstamp_start.minute)
+					result = result + template_size - bisect.bisect_left(template, tstamp_start.hour * 60 + tstamp_start.minute)
+				mask = mask & ~((1 << (tstamp_start.day + 1)) - 1)
+			if (year, month) == end_key:
+				if (mask >> tstamp_end.day) & 1:
+					result = result + _count_template_before(template, tstamp_end)
+				mask = mask & ((1 << tstamp_end.day) - 1)
+			result = result + _count_bits(mask) * template_size
+		if month == 12:
+			year, month = year + 1, 1
+		else:
+			month = month + 1
+	return result
+
+
+def filter_range_by_rule(rulearray, tstamp_start, tstamp_end, tz=None, compact=False):
+	""" filter time-stamps within given range by given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		tstamp_start - range start (inclusive)
+		tstamp_end - range end (exclusive)
+		tz=None - time zone to evaluate the rule in, see iter_range_by_rule
+		compact=False - return TimestampSequence backed by integer array instead of list (naive time-stamps only)
+	Return:
+		list (or TimestampSequence) of datetime object which complies to given rule array
+	"""
+	if compact:
+		if tz is not None:
+			raise ValueError("compact result only supports naive time-stamps")
+		compiled = compile_rulearray(rulearray)
+		unit_seconds = 1 if isinstance(compiled, CompiledSecondRuleArray) else 60
+		epoch_end = _datetime_to_epoch(tstamp_end) + (1 if tstamp_end.microsecond else 0)
+		return TimestampSequence(_expand_epoch_range(compiled, _datetime_to_epoch(tstamp_start), epoch_end, 0, unit_seconds), unit_seconds)
+	return list(iter_range_by_rule(rulearray, tstamp_start, tstamp_end, tz))
+
+
+# 1970-01-01 as proleptic Gregorian ordinal
+_EPOCH_ORDINAL = 719163
+
+_EPOCH_DATETIME = datetime.datetime(1970, 1, 1)
+
+
+def _days_from_civil(year, month, day):
+	""" (internal) get number of days since 1970-01-01 of given date with integer arithmetic """
+	if month <= 2:
+		year = year - 1
+	era = year // 400
+	year_of_era = year - era * 400
+	day_of_year = (153 * (month + (-3 if (month > 2) else 9)) + 2) // 5 + day - 1
+	day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+	return era * 146097 + day_of_era - 719468
+
+
+def _civil_from_days(day_number):
+	""" (internal) get (year, month, day) of given number of days since 1970-01-01 with integer arithmetic """
+	day_number = day_number + 719468
+	era = day_number // 146097
+	day_of_era = day_number - era * 146097
+	year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+	day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+	mp = (5 * day_of_year + 2) // 153
+	day = day_of_year - (153 * mp + 2) // 5 + 1
+	month = mp + (3 if (mp < 10) else -9)
+	return (year_of_era + era * 400 + (1 if (month <= 2) else 0), month, day)
+
+
+def _utc_offset_seconds(utc_offset):
+	if isinstance(utc_offset, datetime.timedelta):
+		return int(utc_offset.total_seconds())
+	return int(utc_offset)
+
+
+def _epoch_to_datetime(local_epoch):
+	return _EPOCH_DATETIME + datetime.timedelta(seconds=local_epoch)
+
+
+def _datetime_to_epoch(d):
+	return (d.toordinal() - _EPOCH_ORDINAL) * 86400 + d.hour * 3600 + d.minute * 60 + d.second
+
+
+def _epoch_engine_parts(compiled):
+	""" (internal) get compiled five-field rule array and second-of-day template, template is None if integer engine cannot handle the rule array """
+	if isinstance(compiled, CompiledSecondRuleArray):
+		if compiled.second_rules or (not compiled.minute_compiled.is_field_skippable):
+			return (compiled.minute_compiled, None)
+		return (compiled.minute_compiled, compiled.second_of_day_values)
+	if not compiled.is_field_skippable:
+		return (compiled, None)
+	return (compiled, compiled.second_of_day_values)
+
+
+def _iter_epoch_day_runs(compiled, template, local_start, local_end):
+	""" (internal) generate accepted days as (base, lower index, upper index) where base + template[lower:upper] are the fires
+
+	Parameter:
+		compiled - compiled five-field rule array
+		template - sorted second-of-day template
+		local_start - range start in local epoch seconds (inclusive)
+		local_end - range end in local epoch seconds (exclusive), None for open-ended search
+	"""
+	months = compiled.month_values
+	if (not template) or (not months):
+		return
+	template_size = len(template)
+	year, month, day = _civil_from_days(local_start // 86400)
+	end_year_month = None if (local_end is None) else _civil_from_days((local_end - 1) // 86400)[:2]
+	year_horizon = year + _CALENDAR_CYCLE_YEARS
+	while (year <= datetime.MAXYEAR) and (year <= year_horizon):
+		if (end_year_month is not None) and ((year, month) > end_year_month):
+			return
+		if (compiled.month_mask >> month) & 1:
+			mask = (_accepted_day_mask_of_month(compiled, year, month) >> day) << day
+			day_number_base = _days_from_civil(year, month, 1) - 1
+			while mask:
+				lowest_bit = mask & -mask
+				mask = mask ^ lowest_bit
+				base = (day_number_base + lowest_bit.bit_length() - 1) * 86400
+				if (local_end is not None) and (base >= local_end):
+					return
+				lower_idx = bisect.bisect_left(template, local_start - base) if (base < local_start) else 0
+				upper_idx = bisect.bisect_left(template, local_end - base) if ((local_end is not None) and (base + 86400 > local_end)) else template_size
+				if lower_idx < upper_idx:
+					yield (base, lower_idx, upper_idx)
+					year_horizon = year + _CALENDAR_CYCLE_YEARS
+		idx = bisect.bisect_right(months, month)
+		if idx < len(months):
+			month = months[idx]
+		else:
+			year = year + 1
+			month = months[0]
+		day = 1
+
+
+def _truncate_local_epoch(compiled, local_epoch):
+	if isinstance(compiled, CompiledSecondRuleArray):
+		return local_epoch
+	return local_epoch - local_epoch % 60
+
+
+def check_epoch_by_rule(rulearray, epoch, utc_offset=0):
+	""" check if given Unix epoch time is comply to the given rule array
+
+	Only compiled rule arrays (see compile_rulearray) are checked with integer arithmetic, plain rule arrays
+	are checked through check_timestamp_by_rule to avoid compiling on each call.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		epoch - Unix epoch time in seconds
+		utc_offset=0 - fixed offset of local time from UTC in seconds (or timedelta)
+	Return:
+		True if given time complied, False otherwise
+	"""
+	local_epoch = epoch + _utc_offset_seconds(utc_offset)
+	if not isinstance(rulearray, (CompiledRuleArray, CompiledSecondRuleArray, CronSchedule)):
+		return check_timestamp_by_rule(rulearray, _epoch_to_datetime(local_epoch))
+	compiled = compile_rulearray(rulearray)
+	minute_compiled, template = _epoch_engine_parts(compiled)
+	if template is None:
+		return compiled.is_accept(_epoch_to_datetime(local_epoch))
+	day_number, second_of_day = divmod(local_epoch, 86400)
+	if minute_compiled is not compiled:
+		if not ((compiled.second_mask >> (second_of_day % 60)) & 1):
+			return False
+	if not ((minute_compiled.minute_mask >> ((second_of_day // 60) % 60)) & 1):
+		return False
+	if not ((minute_compiled.hour_mask >> (second_of_day // 3600)) & 1):
+		return False
+	year, month, day = _civil_from_days(day_number)
+	if not ((minute_compiled.month_mask >> month) & 1):
+		return False
+	if minute_compiled.day_rules or minute_compiled.weekday_rules:
+		return bool((_accepted_day_mask_of_month(minute_compiled, year, month) >> day) & 1)
+	return bool(((minute_compiled.day_mask >> day) & 1) and ((minute_compiled.weekday_mask >> ((day_number + 3) % 7 + 1)) & 1))
+
+
+def next_fire_epoch(rulearray, after, utc_offset=0):
+	""" find the first Unix epoch time after given epoch time which complies to given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		after - Unix epoch time in seconds to search from (exclusive)
+		utc_offset=0 - fixed offset of local time from UTC in seconds (or timedelta)
+	Return:
+		Unix epoch time in seconds of the next fire time, or None if the rule array cannot be fulfilled
+	"""
+	compiled = compile_rulearray(rulearray)
+	utc_offset = _utc_offset_seconds(utc_offset)
+	minute_compiled, template = _epoch_engine_parts(compiled)
+	if template is None:
+		d = next_fire_time(compiled, _epoch_to_datetime(after + utc_offset))
+		return None if (d is None) else (_datetime_to_epoch(d) - utc_offset)
+	local_start = _truncate_local_epoch(compiled, after + utc_offset) + (1 if (minute_compiled is not compiled) else 60)
+	for base, lower_idx, _upper_idx in _iter_epoch_day_runs(minute_compiled, template, local_start, None):
+		return base + template[lower_idx] - utc_offset
+	return None
+
+
+def filter_epoch_range_by_rule(rulearray, epoch_start, epoch_end, utc_offset=0):
+	""" get Unix epoch times within given range by given rule array
+
+	Calendar arithmetic is done on integers, no datetime object is created for each fire.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		epoch_start - range start in Unix epoch seconds (inclusive, truncated to minute for five-field rule array)
+		epoch_end - range end in Unix epoch seconds (exclusive)
+		utc_offset=0 - fixed offset of local time from UTC in seconds (or timedelta)
+	Return:
+		array.array of type 'q' of Unix epoch seconds which comply to given rule array
+	"""
+	return _expand_epoch_range(compile_rulearray(rulearray), epoch_start, epoch_end, _utc_offset_seconds(utc_offset), 1)
+
+
+def _expand_epoch_range(compiled, epoch_start, epoch_end, utc_offset, unit_seconds):
+	""" (internal) expand fires within given epoch range into array of epoch time in units of given seconds """
+	minute_compiled, template = _epoch_engine_parts(compiled)
+	result = array.array('q')
+	if template is None:
+		for d in _iter_forward(compiled, _epoch_to_datetime(epoch_start + utc_offset), _epoch_to_datetime(epoch_end + utc_offset)):
+			result.append((_datetime_to_epoch(d) - utc_offset) // unit_seconds)
+		return result
+	local_start = _truncate_local_epoch(compiled, epoch_start + utc_offset)
+	unit_template = template if (unit_seconds == 1) else tuple([(v // unit_seconds) for v in template])
+	for base, lower_idx, upper_idx in _iter_epoch_day_runs(minute_compiled, template, local_start, epoch_end + utc_offset):
+		base = (base - utc_offset) // unit_seconds
+		result.extend([(base + v) for v in unit_template[lower_idx:upper_idx]])
+	return result
+
+
+class TimestampSequence(collections.abc.Sequence):
+	""" read-only sequence of ascending naive time-stamps backed by compact integer array
+
+	Time-stamps are kept as number of units (minutes, or seconds for six-field rule arrays) since
+	1970-01-01 in an array.array of type 'q', datetime objects are only created when elements are accessed.
+	"""
+
+	__slots__ = (
+			'values',
+			'unit_seconds',
+	)
+
+	def __init__(self, values, unit_seconds=60):
+		""" constructor of time-stamp sequence.
+
+		Parameter:
+			values - array.array of type 'q' of ascending time-stamps in units since 1970-01-01
+			unit_seconds=60 - number of seconds of each unit
+		"""
+		self.values = values
+		self.unit_seconds = unit_seconds
+
+	def _to_datetime(self, v):
+		return _EPOCH_DATETIME + datetime.timedelta(seconds=(v * self.unit_seconds))
+
+	def __len__(self):
+		return len(self.values)
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			return TimestampSequence(self.values[idx], self.unit_seconds)
+		return self._to_datetime(self.values[idx])
+
+	def __iter__(self):
+		for v in self.values:
+			yield self._to_datetime(v)
+
+	def __reversed__(self):
+		for v in reversed(self.values):
+			yield self._to_datetime(v)
+
+	def bisect_left(self, tstamp):
+		""" get index of the first time-stamp which is not earlier than given time-stamp """
+		total_microseconds = _datetime_to_epoch(tstamp) * 1000000 + tstamp.microsecond
+		return bisect.bisect_left(self.values, -((-total_microseconds) // (self.unit_seconds * 1000000)))
+
+	def bisect_right(self, tstamp):
+		""" get index of the first time-stamp which is later than given time-stamp """
+		return bisect.bisect_right(self.values, _datetime_to_epoch(tstamp) // self.unit_seconds)
+
+	def index(self, value, start=0, stop=None):
+		idx = self.bisect_left(value)
+		if (idx < len(self.values)) and (start <= idx) and ((stop is None) or (idx < stop)) and (self._to_datetime(self.values[idx]) == value):
+			return idx
+		raise ValueError("%r is not in sequence" % (value, ))
+
+	def __contains__(self, tstamp):
+		try:
+			self.index(tstamp)
+		except ValueError:
+			return False
+		return True
+
+	def count(self, value):
+		return 1 if (value in self) else 0
+
+	def __repr__(self):
+		return "%s.TimestampSequence(<%d time-stamps>, unit_seconds=%d)" % (
+				self.__module__,
+				len(self.values),
+				self.unit_seconds,
+		)
+
+
+def _template_run_ends(template, unit_seconds):
+	""" (internal) get index one past the end of the run of consecutive template values containing each index """
+	template_size = len(template)
+	result = [template_size] * template_size
+	for idx in range(template_size - 2, -1, -1):
+		if template[idx + 1] - template[idx] == unit_seconds:
+			result[idx] = result[idx + 1]
+		else:
+			result[idx] = idx + 1
+	return result
+
+
+def iter_intervals_by_rule(rulearray, tstamp_start, tstamp_end):
+	""" generate runs of consecutive time-stamps within given range by given rule array as (start, end) intervals
+
+	Runs are cut from the minute-of-day template of each accepted day and merged across day boundaries, no
+	datetime object is created for the individual time-stamps. The end of each interval is exclusive, so a
+	rule which fires on every minute from 09:00 to 17:59 gives (09:00, 18:00).
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		tstamp_start - range start (inclusive, truncated to minute for five-field rule array)
+		tstamp_end - range end (exclusive)
+	Return:
+		generator of 2 element tuple of datetime object, start (inclusive) and end (exclusive) of a run
+	"""
+	compiled = compile_rulearray(rulearray)
+	minute_compiled, template = _epoch_engine_parts(compiled)
+	unit_seconds = 60 if (minute_compiled is compiled) else 1
+	unit_delta = datetime.timedelta(seconds=unit_seconds)
+	if template is None:
+		run_start = None
+		for d in _iter_forward(compiled, tstamp_start, tstamp_end):
+			if run_start is None:
+				run_start = d
+			elif d != run_end:
+				yield (run_start, run_end)
+				run_start = d
+			run_end = d + unit_delta
+		if run_start is not None:
+			yield (run_start, run_end)
+		return
+	run_ends = _template_run_ends(template, unit_seconds)
+	local_start = _truncate_local_epoch(compiled, _datetime_to_epoch(tstamp_start))
+	local_end = _datetime_to_epoch(tstamp_end) + (1 if tstamp_end.microsecond else 0)
+	run_start = None
+	for base, lower_idx, upper_idx in _iter_epoch_day_runs(minute_compiled, template, local_start, local_end):
+		idx = lower_idx
+		while idx < upper_idx:
+			next_idx = min(run_ends[idx], upper_idx)
+			start_epoch = base + template[idx]
+			if run_start is None:
+				run_start = start_epoch
+			elif start_epoch != run_end:
+				yield (_epoch_to_datetime(run_start), _epoch_to_datetime(run_end))
+				run_start = start_epoch
+			run_end = base + template[next_idx - 1] + unit_seconds
+			idx = next_idx
+	if run_start is not None:
+		yield (_epoch_to_datetime(run_start), _epoch_to_datetime(run_end))
+
+
+def filter_intervals_by_rule(rulearray, tstamp_start, tstamp_end):
+	""" get list of runs of consecutive time-stamps within given range by given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		tstamp_start - range start (inclusive)
+		tstamp_end - range end (exclusive)
+	Return:
+		list of 2 element tuple of datetime object, see iter_intervals_by_rule
+	"""
+	return list(iter_intervals_by_rule(rulearray, tstamp_start, tstamp_end))
+
+
+def nth_fire_after(rulearray, after, k):
+	""" find the k-th time-stamp after given time-stamp which complies to given rule array
+
+	Whole days and months are skipped by their number of fires (accepted days times the size of the
+	minute-of-day template), so the cost depends on the number of months crossed rather than on k.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		after - the time-stamp to search from (exclusive)
+		k - occurrence number, 1 for the next fire time
+	Return:
+		datetime object of the k-th fire time, or None if the rule array does not fire k times
+	"""
+	if k < 1:
+		raise ValueError("occurrence number must be positive: %r" % (k, ))
+	compiled = compile_rulearray(rulearray)
+	minute_compiled, template = _epoch_engine_parts(compiled)
+	unit_seconds = 60 if (minute_compiled is compiled) else 1
+	if template is None:
+		tstamp_start = _truncate_to_second(after) if (unit_seconds == 1) else _truncate_to_minute(after)
+		for d in itertools.islice(_iter_forward(compiled, tstamp_start + datetime.timedelta(seconds=unit_seconds), None), k - 1, None):
+			return d
+		return None
+	months = minute_compiled.month_values
+	if (not template) or (not months):
+		return None
+	template_size = len(template)
+	local_start = _truncate_local_epoch(compiled, _datetime_to_epoch(after)) + unit_seconds
+	year, month, day = _civil_from_days(local_start // 86400)
+	start_second_of_day = local_start % 86400
+	year_horizon = year + _CALENDAR_CYCLE_YEARS
+	while (year <= datetime.MAXYEAR) and (year <= year_horizon):
+		if (minute_compiled.month_mask >> month) & 1:
+			mask = (_accepted_day_mask_of_month(minute_compiled, year, month) >> day) << day
+			if mask:
+				year_horizon = year + _CALENDAR_CYCLE_YEARS
+				day_number_base = _days_from_civil(year, month, 1) - 1
+				if start_second_of_day and ((mask >> day) & 1):
+					# partial first day
+					lower_idx = bisect.bisect_left(template, start_second_of_day)
+					if k <= template_size - lower_idx:
+						return _epoch_to_datetime((day_number_base + day) * 86400 + template[lower_idx + k - 1])
+					k = k - (template_size - lower_idx)
+					mask = mask ^ (1 << day)
+				fire_count = _count_bits(mask) * template_size
+				if k <= fire_count:
+					day_idx, template_idx = divmod(k - 1, template_size)
+					for _i in range(day_idx):
+						mask = mask & (mask - 1)
+					accepted_day = (mask & -mask).bit_length() - 1
+					return _epoch_to_datetime((day_number_base + accepted_day) * 86400 + template[template_idx])
+				k = k - fire_count
+		idx = bisect.bisect_right(months, month)
+		if idx < len(months):
+			month = months[idx]
+		else:
+			year = year + 1
+			month = months[0]
+		day, start_second_of_day = 1, 0
+	return None
+
+
+def fires_in_range(rulearray, tstamp_start, tstamp_end):
+	""" check if given rule array fires at least once within given range
+
+	The search stops at the first accepted day which has a fire within the range, months and days which are
+	not accepted are skipped by their bitmasks.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring or parse_cronstring_with_second, or compiled rule array
+		tstamp_start - range start (inclusive, truncated to minute for five-field rule array)
+		tstamp_end - range end (exclusive)
+	Return:
+		True if there is any fire within given range, False otherwise
+	"""
+	compiled = compile_rulearray(rulearray)
+	minute_compiled, template = _epoch_engine_parts(compiled)
+	if template is None:
+		for _d in _iter_forward(compiled, tstamp_start, tstamp_end):
+			return True
+		return False
+	local_start = _truncate_local_epoch(compiled, _datetime_to_epoch(tstamp_start))
+	local_end = _datetime_to_epoch(tstamp_end) + (1 if tstamp_end.microsecond else 0)
+	if local_start >= local_end:
+		return False
+	for _run in _iter_epoch_day_runs(minute_compiled, template, local_start, local_end):
+		return True
+	return False
+
+
+def _require_numpy(funcname):
+	""" (internal) import NumPy into module namespace on first use """
+	global numpy  # pylint: disable=global-statement
+	if numpy is None:
+		try:
+			import numpy as numpy_module  # pylint: disable=import-outside-toplevel
+		except ImportError:
+			raise ImportError("NumPy is required by %s()" % (funcname, )) from None
+		numpy = numpy_module
+
+
+def _mask_to_lookup_table(mask, size):
+	return numpy.array([((mask >> v) & 1) == 1 for v in range(size)], dtype=bool)
+
+
+def mask_by_rule(rulearray, tstamps):
+	""" check every time-stamp of given datetime64 array against given rule array in vectorised way (requires NumPy)
+
+	Day and weekday rules (including L, W, nL and n#k) are evaluated once per distinct month in the array
+	into a bitmask of accepted days, which is then looked up for every element.
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, or compiled rule array
+		tstamps - array-like of numpy.datetime64 (or datetime objects), NaT never complies
+	Return:
+		boolean ndarray with the same shape as given array, True for time-stamps which comply to given rule array
+	"""
+	_require_numpy('mask_by_rule')
+	compiled = compile_rulearray(rulearray)
+	_reject_second_rulearray(compiled, 'mask_by_rule')
+	arr = numpy.asarray(tstamps)
+	if arr.dtype.kind != 'M':
+		arr = arr.astype('datetime64[us]')
+	shape = arr.shape
+	arr_minutes = arr.ravel().astype('datetime64[m]')
+	valid = ~numpy.isnat(arr_minutes)
+	if not compiled.is_field_skippable:
+		result = numpy.zeros(arr_minutes.shape, dtype=bool)
+		for idx in numpy.flatnonzero(valid):
+			result[idx] = compiled.is_accept(arr_minutes[idx].astype(datetime.datetime))
+		return result.reshape(shape)
+	arr_minutes[~valid] = numpy.datetime64(0, 'm')
+	arr_days = arr_minutes.astype('datetime64[D]')
+	arr_months = arr_days.astype('datetime64[M]')
+	minute_of_day = (arr_minutes - arr_days).astype(numpy.int64)
+	month_index = arr_months.astype(numpy.int64)  # months since 1970-01
+	day = (arr_days - arr_months.astype('datetime64[D]')).astype(numpy.int64) + 1
+	result = valid
+	result = result & _mask_to_lookup_table(compiled.minute_mask, 60)[minute_of_day % 60]
+	result = result & _mask_to_lookup_table(compiled.hour_mask, 24)[minute_of_day // 60]
+	result = result & _mask_to_lookup_table(compiled.month_mask, 13)[(month_index % 12) + 1]
+	distinct_months, month_inverse = numpy.unique(month_index, return_inverse=True)
+	day_masks = numpy.zeros(distinct_months.shape, dtype=numpy.int64)
+	for idx, v in enumerate(distinct_months.tolist()):
+		year = (v // 12) + 1970
+		month = (v % 12) + 1
+		if (compiled.month_mask >> month) & 1 and (datetime.MINYEAR <= year <= datetime.MAXYEAR):
+			day_masks[idx] = _accepted_day_mask_of_month(compiled, year, month)
+	result = result & (((day_masks[month_inverse.ravel()] >> day) & 1) == 1)
+	return result.reshape(shape)
+
+
+# maximum number of days of each month (index 0 unused), February counts leap day
+_MAX_DAYS_OF_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _lowest_bit_index(masks):
+	""" (internal) get index of lowest set bit of every non-zero element of given int64 array """
+	return numpy.log2(masks & -masks).astype(numpy.int64)
+
+
+class RuleTable:
+	""" columnar table of many rule arrays with one bitmask column per field (requires NumPy)
+
+	Rows of rule arrays with L, W, nL or n#k rules (or custom rule objects) are marked in the fallback
+	column and resolved by the field-skipping engine one by one.
+	"""
+
+	def __init__(self, rulearrays):
+		""" constructor of rule table.
+
+		Parameter:
+			rulearrays - iterable of rule arrays generated by parse_cronstring, compiled rule arrays or CronSchedule objects
+		"""
+		_require_numpy('RuleTable')
+		self.compiled = [compile_rulearray(rulearray) for rulearray in rulearrays]
+		for compiled in self.compiled:
+			_reject_second_rulearray(compiled, 'RuleTable')
+		self.minute_masks = numpy.array([c.minute_mask for c in self.compiled], dtype=numpy.int64)
+		self.hour_masks = numpy.array([c.hour_mask for c in self.compiled], dtype=numpy.int64)
+		self.day_masks = numpy.array([c.day_mask for c in self.compiled], dtype=numpy.int64)
+		self.month_masks = numpy.array([c.month_mask for c in self.compiled], dtype=numpy.int64)
+		self.weekday_masks = numpy.array([c.weekday_mask for c in self.compiled], dtype=numpy.int64)
+		self.fallback = numpy.array([((not c.is_field_skippable) or bool(c.day_rules) or bool(c.weekday_rules)) for c in self.compiled], dtype=bool)
+		# rows which can fire at all: every day and weekday combination occurs within a 400-year cycle
+		possible_day_masks = numpy.zeros(len(self.compiled), dtype=numpy.int64)
+		for month in range(1, 13):
+			possible_day_masks = possible_day_masks | numpy.where((self.month_masks >> month) & 1, (1 << (_MAX_DAYS_OF_MONTH[month] + 1)) - 2, 0)
+		self.possible = (~self.fallback) & (self.minute_masks != 0) & (self.hour_masks != 0) & (self.weekday_masks != 0) & (
+				(self.day_masks & possible_day_masks) != 0)
+
+	def __len__(self):
+		return len(self.compiled)
+
+
+def _first_minute_of_day_from(table, rows, start_mod):
+	""" (internal) get the first accepted minute-of-day not earlier than start_mod for given rows, -1 if none """
+	hour = start_mod // 60
+	minute = start_mod % 60
+	minute_masks = table.minute_masks[rows]
+	hour_masks = table.hour_masks[rows]
+	result = numpy.full(minute_masks.shape, -1, dtype=numpy.int64)
+	later_minutes = minute_masks & ~numpy.int64((1 << minute) - 1)
+	in_hour = (((hour_masks >> hour) & 1) == 1) & (later_minutes != 0)
+	result[in_hour] = hour * 60 + _lowest_bit_index(later_minutes[in_hour])
+	later_hours = hour_masks & ~numpy.int64((1 << (hour + 1)) - 1)
+	in_later_hour = (~in_hour) & (later_hours != 0) & (minute_masks != 0)
+	result[in_later_hour] = _lowest_bit_index(later_hours[in_later_hour]) * 60 + _lowest_bit_index(minute_masks[in_later_hour])
+	return result
+
+
+def next_fire_times(table, after):
+	""" compute the next fire time after given time-stamp for every row of given rule table in vectorised way (requires NumPy)
+
+	Parameter:
+		table - RuleTable object (or iterable of rule arrays)
+		after - the time-stamp to search from (exclusive)
+	Return:
+		numpy.datetime64[m] array with one element per row, NaT for rows which never fire
+	"""
+	_require_numpy('next_fire_times')
+	if not isinstance(table, RuleTable):
+		table = RuleTable(table)
+	start = _truncate_to_minute(after) + datetime.timedelta(minutes=1)
+	result = numpy.full(len(table), numpy.datetime64('NaT'), dtype='datetime64[m]')
+	pending = numpy.flatnonzero(table.possible)
+	first_mods = _first_minute_of_day_from(table, pending, 0)
+	start_mods = _first_minute_of_day_from(table, pending, start.hour * 60 + start.minute)
+	year, month = start.year, start.month
+	is_first_month = True
+	while pending.size and (year <= datetime.MAXYEAR):
+		selected = ((table.month_masks[pending] >> month) & 1) == 1
+		if selected.any():
+			rows = pending[selected]
+			first_weekday, last_day = calendar.monthrange(year, month)
+			weekday_masks = table.weekday_masks[rows]
+			weekday_day_masks = numpy.zeros(rows.shape, dtype=numpy.int64)
+			for weekday in range(1, 8):
+				weekday_day_masks = weekday_day_masks | numpy.where((weekday_masks >> weekday) & 1, _WEEKLY_DAY_MASKS[(weekday - first_weekday - 1) % 7], 0)
+			day_masks = table.day_masks[rows] & weekday_day_masks & ((1 << (last_day + 1)) - 2)
+			mods = first_mods[selected]
+			if is_first_month:
+				day_masks = day_masks & ~numpy.int64((1 << start.day) - 1)
+				row_start_mods = start_mods[selected]
+				day_masks = numpy.where(row_start_mods < 0, day_masks & ~numpy.int64(1 << start.day), day_masks)
+			found = day_masks != 0
+			if found.any():
+				days = _lowest_bit_index(day_masks[found])
+				mods = mods[found]
+				if is_first_month:
+					mods = numpy.where(days == start.day, row_start_mods[found], mods)
+				month_start = numpy.datetime64(datetime.datetime(year, month, 1), 'm')
+				result[rows[found]] = month_start + ((days - 1) * 1440 + mods).astype('timedelta64[m]')
+				resolved = numpy.zeros(pending.shape, dtype=bool)
+				resolved[numpy.flatnonzero(selected)[found]] = True
+				pending = pending[~resolved]
+				first_mods = first_mods[~resolved]
+				start_mods = start_mods[~resolved]
+		is_first_month = False
+		if month == 12:
+			year, month = year + 1, 1
+		else:
+			month = month + 1
+	for idx in numpy.flatnonzero(table.fallback):
+		d = next_fire_time(table.compiled[idx], after)
+		if d is not None:
+			result[idx] = numpy.datetime64(d, 'm')
+	return result
+
+
+class CronSchedule:
+	""" immutable cron schedule which is parsed and compiled once on construction """
+
+	__slots__ = (
+			'rules',
+			'compiled',
+	)
+
+	def __init__(self, rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error=False):
+		""" constructor of cron schedule.
+
+		Parameter:
+			rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
+			raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
+		"""
+		rules = tuple([str(r).strip() for r in (rule_minute, rule_hour, rule_day, rule_month, rule_weekday)])
+		rulearray = parse_cronstring(rules[0], rules[1], rules[2], rules[3], rules[4], raise_error)
+		self.rules = rules
+		self.compiled = CompiledRuleArray(rulearray)
+
+	def __setattr__(self, name, value):
+		# slots can only be filled once, by the constructor
+		if hasattr(self, name):
+			raise AttributeError("CronSchedule object is immutable")
+		object.__setattr__(self, name, value)
+
+	def __delattr__(self, name):
+		raise AttributeError("CronSchedule object is immutable")
+
+	def __reduce__(self):
+		return (CronSchedule, self.rules)
+
+	def __copy__(self):
+		return self
+
+	def __deepcopy__(self, memo):
+		return self
+
+	def __eq__(self, other):
+		if not isinstance(other, CronSchedule):
+			return NotImplemented
+		return self.rules == other.rules
+
+	def __ne__(self, other):
+		if not isinstance(other, CronSchedule):
+			return NotImplemented
+		return self.rules != other.rules
+
+	def __hash__(self):
+		return hash(self.rules)
+
+	def is_accept(self, d):
+		""" test is the given datetime object d complied with the schedule.
+
+		Parameter:
+			d - the datetime object to check
+		Return:
+			True if given object is complied, False otherwise.
+		"""
+		return self.compiled.is_accept(d)
+
+	def next_after(self, after, tz=None):
+		""" find the first fire time after given time-stamp (exclusive), None if the schedule never fires """
+		return next_fire_time(self.compiled, after, tz)
+
+	def previous_before(self, before, tz=None):
+		""" find the last fire time before given time-stamp (exclusive), None if the schedule never fires """
+		return previous_fire_time(self.compiled, before, tz)
+
+	def iter_range(self, tstamp_start, tstamp_end=None, tz=None):
+		""" lazily generate fire times within given range (start inclusive, end exclusive, None for open-ended) """
+		return iter_range_by_rule(self.compiled, tstamp_start, tstamp_end, tz)
+
+	def count_range(self, tstamp_start, tstamp_end):
+		""" count fire times within given range (start inclusive, end exclusive) """
+		return count_range_by_rule(self.compiled, tstamp_start, tstamp_end)
+
+	def __repr__(self):
+		return "%s.CronSchedule(%r, %r, %r, %r, %r)" % (
+				self.__module__,
+				self.rules[0],
+				self.rules[1],
+				self.rules[2],
+				self.rules[3],
+				self.rules[4],
+		)
+
+
+class RuleIndex:
+	""" inverted index of many rule arrays for finding which of them fire at a given minute
+
+	Jobs are indexed by the accepted values of minute, hour, day, month and weekday fields. Jobs with
+	L, W, nL or n#k rules are checked against their own rule array after the minute, hour and month
+	posting sets are intersected.
+	"""
+
+	def __init__(self):
+		""" constructor of rule index. """
+		self.minute_postings = [set() for _v in range(60)]
+		self.hour_postings = [set() for _v in range(24)]
+		self.day_postings = [set() for _v in range(32)]
+		self.month_postings = [set() for _v in range(13)]
+		self.weekday_postings = [set() for _v in range(8)]
+		self.date_rule_jobs = set()
+		self.fallback_jobs = set()
+		self.compiled = {}
+
+	@staticmethod
+	def _update_postings(postings, mask, job_id, is_add):
+		for v in range(len(postings)):
+			if (mask >> v) & 1:
+				if is_add:
+					postings[v].add(job_id)
+				else:
+					postings[v].discard(job_id)
+
+	def _update_index(self, job_id, compiled, is_add):
+		if not compiled.is_field_skippable:
+			if is_add:
+				self.fallback_jobs.add(job_id)
+			else:
+				self.fallback_jobs.discard(job_id)
+			return
+		RuleIndex._update_postings(self.minute_postings, compiled.minute_mask, job_id, is_add)
+		RuleIndex._update_postings(self.hour_postings, compiled.hour_mask, job_id, is_add)
+		RuleIndex._update_postings(self.month_postings, compiled.month_mask, job_id, is_add)
+		if compiled.day_rules or compiled.weekday_rules:
+			if is_add:
+				self.date_rule_jobs.add(job_id)
+			else:
+				self.date_rule_jobs.discard(job_id)
+			return
+		RuleIndex._update_postings(self.day_postings, compiled.day_mask, job_id, is_add)
+		RuleIndex._update_postings(self.weekday_postings, compiled.weekday_mask, job_id, is_add)
+
+	def add(self, job_id, rulearray):
+		""" add (or replace) rule array of given job.
+
+		Parameter:
+			job_id - hashable identifier of the job
+			rulearray - rule array generated by parse_cronstring, compiled rule array or CronSchedule object
+		"""
+		compiled = compile_rulearray(rulearray)
+		_reject_second_rulearray(compiled, 'RuleIndex.add')
+		self.remove(job_id)
+		self.compiled[job_id] = compiled
+		self._update_index(job_id, compiled, True)
+
+	def remove(self, job_id):
+		""" remove given job from the index.
+
+		Parameter:
+			job_id - identifier of the job
+		Return:
+			True if the job was in the index, False otherwise.
+		"""
+		compiled = self.compiled.pop(job_id, None)
+		if compiled is None:
+			return False
+		self._update_index(job_id, compiled, False)
+		return True
+
+	def matching(self, tstamp):
+		""" find jobs which fire at given time-stamp.
+
+		Parameter:
+			tstamp - time-stamp to be check
+		Return:
+			set of job identifiers
+		"""
+		postings = sorted((
+				self.minute_postings[tstamp.minute],
+				self.hour_postings[tstamp.hour],
+				self.month_postings[tstamp.month],
+		), key=len)
+		candidates = postings[0].intersection(postings[1], postings[2])
+		if not candidates:
+			result = set()
+		else:
+			postings = sorted((
+					self.day_postings[tstamp.day],
+					self.weekday_postings[tstamp.isoweekday()],
+			), key=len)
+			result = candidates.intersection(postings[0], postings[1])
+			for job_id in candidates.intersection(self.date_rule_jobs):
+				if self.compiled[job_id].is_accept(tstamp):
+					result.add(job_id)
+		for job_id in self.fallback_jobs:
+			if self.compiled[job_id].is_accept(tstamp):
+				result.add(job_id)
+		return result
+
+	def __len__(self):
+		return len(self.compiled)
+
+	def __contains__(self, job_id):
+		return job_id in self.compiled
+
+
+class CronScheduler:
+	""" multi-job scheduler core which keeps a min-heap of (next fire time, job)
+
+	Removed or replaced jobs are invalidated in place and skipped when they reach the top of the heap, so
+	jobs can be changed at runtime without rebuilding the heap.
+	"""
+
+	def __init__(self):
+		""" constructor of scheduler. """
+		self.heap = []
+		self.entries = {}
+		self.compiled = {}
+		self.lck = threading.RLock()
+		self._seq = itertools.count()
+		self._invalid_count = 0
+
+	def _push(self, job_id, fire_time):
+		if fire_time is None:
+			self.entries.pop(job_id, None)
+			return
+		entry = [fire_time, next(self._seq), job_id, True]
+		self.entries[job_id] = entry
+		heapq.heappush(self.heap, entry)
+
+	def _discard_invalid_top(self):
+		while self.heap and (not self.heap[0][3]):
+			heapq.heappop(self.heap)
+			self._invalid_count = self._invalid_count - 1
+
+	def _invalidate(self, entry):
+		entry[3] = False
+		self._invalid_count = self._invalid_count + 1
+		self._discard_invalid_top()
+		# compact the heap once invalidated entries dominate it
+		if self._invalid_count > max(64, len(self.heap) // 2):
+			self.heap = [e for e in self.heap if e[3]]
+			heapq.heapify(self.heap)
+			self._invalid_count = 0
+
+	def add(self, job_id, rulearray, after):
+		""" add (or replace) given job.
+
+		Parameter:
+			job_id - hashable identifier of the job
+			rulearray - rule array generated by parse_cronstring, compiled rule array or CronSchedule object
+			after - the job fires at the first rule complied time-stamp after this time-stamp
+		Return:
+			the next fire time of the job, None if the rule never fires
+		"""
+		compiled = compile_rulearray(rulearray)
+		fire_time = next_fire_time(compiled, after)
+		with self.lck:
+			self.remove(job_id)
+			self.compiled[job_id] = compiled
+			self._push(job_id, fire_time)
+		return fire_time
+
+	def replace(self, job_id, rulearray, after):
+		""" replace rule of given job, same as add(). """
+		return self.add(job_id, rulearray, after)
+
+	def remove(self, job_id):
+		""" remove given job.
+
+		Parameter:
+			job_id - identifier of the job
+		Return:
+			True if the job was scheduled, False otherwise.
+		"""
+		with self.lck:
+			if self.compiled.pop(job_id, None) is None:
+				return False
+			entry = self.entries.pop(job_id, None)
+			if entry is not None:
+				self._invalidate(entry)
+			return True
+
+	def next_fire_time_of(self, job_id):
+		""" get the next fire time of given job, None if the job is unknown or never fires again """
+		with self.lck:
+			entry = self.entries.get(job_id)
+			return None if (entry is None) else entry[0]
+
+	def peek(self):
+		""" get (fire time, job identifier) of the earliest job, None if no job is scheduled """
+		with self.lck:
+			self._discard_invalid_top()
+			if not self.heap:
+				return None
+			entry = self.heap[0]
+			return (entry[0], entry[2])
+
+	def pop_due(self, now, catch_up=True):
+		""" pop jobs which fire time is not later than given time-stamp and schedule their next fire.
+
+		Parameter:
+			now - the current time-stamp
+			catch_up=True - report every missed fire time of a job, otherwise report a job once and schedule
+				its next fire after given time-stamp
+		Return:
+			list of (fire time, job identifier) in fire time order
+		"""
+		result = []
+		with self.lck:
+			while True:
+				self._discard_invalid_top()
+				if (not self.heap) or (self.heap[0][0] > now):
+					break
+				entry = heapq.heappop(self.heap)
+				fire_time, job_id = entry[0], entry[2]
+				result.append((fire_time, job_id))
+				self._push(job_id, next_fire_time(self.compiled[job_id], fire_time if catch_up else max(fire_time, now)))
+		return result
+
+	def __len__(self):
+		return len(self.compiled)
+
+	def __contains__(self, job_id):
+		return job_id in self.compiled
+
+
+# number of day slots of the outermost wheel of TimingWheelScheduler
+_WHEEL_DAY_SLOTS = 512
+_WHEEL_BLOCK_MINUTES = _WHEEL_DAY_SLOTS * 1440
+
+
+def _to_minute_number(tstamp):
+	return tstamp.toordinal() * 1440 + tstamp.hour * 60 + tstamp.minute
+
+
+class TimingWheelScheduler:
+	""" multi-job scheduler core built on hierarchical timing wheel (minute, hour and day slots)
+
+	Fire times within the current hour live in minute slots, fire times within the current day live in hour
+	slots, and fire times within the current 512-day block live in day slots. Farther fire times are kept
+	per block and cascaded down when the wheel reaches them. Insertion and expiry are O(1); empty hours,
+	days and blocks are skipped while advancing.
+
+	The interface is the same as CronScheduler, except that the wheel works in minutes and rejects rule
+	arrays with second field. Computing the next fire time of each fired job dominates the cost of both
+	backends, so the wheel is not faster than CronScheduler in bench/bench_scheduler.py at 10k or 100k jobs.
+	"""
+
+	def __init__(self):
+		""" constructor of scheduler. """
+		self.minute_slots = [[] for _v in range(60)]
+		self.hour_slots = [[] for _v in range(24)]
+		self.day_slots = [[] for _v in range(_WHEEL_DAY_SLOTS)]
+		self.far_blocks = {}
+		self.overdue = []  # min-heap of entries which fire before the cursor of wheel
+		self._seq = itertools.count()
+		self.level_counts = [0, 0, 0, 0]
+		self.current = None
+		self.entries = {}
+		self.compiled = {}
+		self.lck = threading.RLock()
+
+	def _place(self, entry):
+		# entry: [minute number, job identifier, is valid, fire time]
+		t = entry[0]
+		current = self.current
+		if t < current:
+			heapq.heappush(self.overdue, (entry[3], next(self._seq), entry))
+		elif (t // 60) == (current // 60):
+			self.minute_slots[t % 60].append(entry)
+			self.level_counts[0] = self.level_counts[0] + 1
+		elif (t // 1440) == (current // 1440):
+			self.hour_slots[(t // 60) % 24].append(entry)
+			self.level_counts[1] = self.level_counts[1] + 1
+		elif (t // _WHEEL_BLOCK_MINUTES) == (current // _WHEEL_BLOCK_MINUTES):
+			self.day_slots[(t // 1440) % _WHEEL_DAY_SLOTS].append(entry)
+			self.level_counts[2] = self.level_counts[2] + 1
+		else:
+			self.far_blocks.setdefault(t // _WHEEL_BLOCK_MINUTES, []).append(entry)
+			self.level_counts[3] = self.level_counts[3] + 1
+
+	def _push(self, job_id, fire_time):
+		if fire_time is None:
+			self.entries.pop(job_id, None)
+			return
+		t = _to_minute_number(fire_time)
+		if self.current is None:
+			self.current = t
+		entry = [t, job_id, True, fire_time]
+		self.entries[job_id] = entry
+		self._place(entry)
+
+	def _cascade(self, slots, idx, level):
+		moving = slots[idx]
+		slots[idx] = []
+		self.level_counts[level] = self.level_counts[level] - len(moving)
+		for entry in moving:
+			if entry[2]:
+				self._place(entry)
+
+	def _enter_minute(self, t):
+		""" move the cursor to minute t and cascade the slots which start at t """
+		self.current = t
+		if (t % _WHEEL_BLOCK_MINUTES) == 0:
+			moving = self.far_blocks.pop(t // _WHEEL_BLOCK_MINUTES, [])
+			self.level_counts[3] = self.level_counts[3] - len(moving)
+			for entry in moving:
+				if entry[2]:
+					self._place(entry)
+		if (t % 1440) == 0:
+			self._cascade(self.day_slots, (t // 1440) % _WHEEL_DAY_SLOTS, 2)
+		if (t % 60) == 0:
+			self._cascade(self.hour_slots, (t // 60) % 24, 1)
+
+	def add(self, job_id, rulearray, after):
+		""" add (or replace) given job.
+
+		Parameter:
+			job_id - hashable identifier of the job
+			rulearray - rule array generated by parse_cronstring, compiled rule array or CronSchedule object
+			after - the job fires at the first rule complied time-stamp after this time-stamp
+		Return:
+			the next fire time of the job, None if the rule never fires
+		"""
+		compiled = compile_rulearray(rulearray)
+		_reject_second_rulearray(compiled, 'TimingWheelScheduler.add')
+		fire_time = next_fire_time(compiled, after)
+		with self.lck:
+			self.remove(job_id)
+			self.compiled[job_id] = compiled
+			self._push(job_id, fire_time)
+		return fire_time
+
+	def replace(self, job_id, rulearray, after):
+		""" replace rule of given job, same as add(). """
+		return self.add(job_id, rulearray, after)
+
+	def remove(self, job_id):
+		""" remove given job.
+
+		Parameter:
+			job_id - identifier of the job
+		Return:
+			True if the job was scheduled, False otherwise.
+		"""
+		with self.lck:
+			if self.compiled.pop(job_id, None) is None:
+				return False
+			entry = self.entries.pop(job_id, None)
+			if entry is not None:
+				entry[2] = False
+			return True
+
+	def next_fire_time_of(self, job_id):
+		""" get the next fire time of given job, None if the job is unknown or never fires again """
+		with self.lck:
+			entry = self.entries.get(job_id)
+			return None if (entry is None) else entry[3]
+
+	def _discard_invalid_overdue_top(self):
+		while self.overdue and (not self.overdue[0][2][2]):
+			heapq.heappop(self.overdue)
+
+	def peek(self):
+		""" get (fire time, job identifier) of the earliest job, None if no job is scheduled """
+		with self.lck:
+			if self.current is None:
+				return None
+			# overdue entries fire before everything in the wheel
+			self._discard_invalid_overdue_top()
+			if self.overdue:
+				entry = self.overdue[0][2]
+				return (entry[3], entry[1])
+			current = self.current
+			candidates = [self.minute_slots[idx] for idx in range(current % 60, 60)]
+			candidates.extend([self.hour_slots[idx] for idx in range((current // 60) % 24 + 1, 24)])
+			candidates.extend([self.day_slots[idx] for idx in range((current // 1440) % _WHEEL_DAY_SLOTS + 1, _WHEEL_DAY_SLOTS)])
+			candidates.extend([self.far_blocks[k] for k in sorted(self.far_blocks)])
+			for slot in candidates:
+				valid_entries = [entry for entry in slot if entry[2]]
+				if valid_entries:
+					entry = min(valid_entries, key=lambda e: (e[0], e[3]))
+					return (entry[3], entry[1])
+			return None
+
+	def _fire(self, due, now, catch_up, result):
+		due.sort(key=lambda e: e[3])
+		for entry in due:
+			entry[2] = False
+			fire_time, job_id = entry[3], entry[1]
+			result.append((fire_time, job_id))
+			self._push(job_id, next_fire_time(self.compiled[job_id], fire_time if catch_up else max(fire_time, now)))
+
+	def pop_due(self, now, catch_up=True):
+		""" pop jobs which fire time is not later than given time-stamp and schedule their next fire.
+
+		Parameter:
+			now - the current time-stamp
+			catch_up=True - report every missed fire time of a job, otherwise report a job once and schedule
+				its next fire after given time-stamp
+		Return:
+			list of (fire time, job identifier) in fire time order
+		"""
+		result = []
+		target = _to_minute_number(now)
+		with self.lck:
+			if self.current is None:
+				self.current = target + 1
+				return result
+			while self.overdue and (self.overdue[0][2][0] <= target):
+				entry = heapq.heappop(self.overdue)[2]
+				if entry[2]:
+					self._fire([entry], now, catch_up, result)
+			while self.current <= target:
+				current = self.current
+				due = self.minute_slots[current % 60]
+				if due:
+					self.minute_slots[current % 60] = []
+					self.level_counts[0] = self.level_counts[0] - len(due)
+					self._fire([entry for entry in due if entry[2]], now, catch_up, result)
+				if self.level_counts[0]:
+					t = current + 1
+				elif self.level_counts[1]:
+					t = (current // 60 + 1) * 60
+				elif self.level_counts[2]:
+					t = (current // 1440 + 1) * 1440
+				elif self.level_counts[3]:
+					t = (current // _WHEEL_BLOCK_MINUTES + 1) * _WHEEL_BLOCK_MINUTES
+				else:
+					t = target + 1
+				self._enter_minute(min(t, target + 1))
+		return result
+
+	def __len__(self):
+		return len(self.compiled)
+
+	def __contains__(self, job_id):
+		return job_id in self.compiled
+
+
+# longest single sleep of asyncio helpers, wall clock is re-checked after every chunk to correct drift
+_ASYNC_SLEEP_CHUNK = 60.0
+
+
+async def _sleep_until(tstamp, now_func):
+	""" (internal) sleep on the monotonic clock of event loop until wall clock reaches given time-stamp """
+	# asyncio is imported here, the only place which needs it, as it costs most of the import time of this module
+	import asyncio  # pylint: disable=import-outside-toplevel
+	while True:
+		remaining = (tstamp - now_func()).total_seconds()
+		if remaining <= 0:
+			return
+		await asyncio.sleep(min(remaining, _ASYNC_SLEEP_CHUNK))
+
+
+async def sleep_until_next(rulearray, now_func=datetime.datetime.now):
+	""" sleep until the next fire time of given rule array
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, compiled rule array or CronSchedule object
+		now_func=datetime.datetime.now - function which gives current wall clock time-stamp
+	Return:
+		the fire time slept until, None (without sleeping) if the rule never fires
+	"""
+	fire_time = next_fire_time(compile_rulearray(rulearray), now_func())
+	if fire_time is None:
+		return None
+	await _sleep_until(fire_time, now_func)
+	return fire_time
+
+
+async def aiter_fires(rulearray, after=None, now_func=datetime.datetime.now, catch_up=False):
+	""" asynchronously generate fire times of given rule array as each of them is reached
+
+	Parameter:
+		rulearray - rule array generated by parse_cronstring, compiled rule array or CronSchedule object
+		after=None - generate fire times after this time-stamp, current time if None
+		now_func=datetime.datetime.now - function which gives current wall clock time-stamp
+		catch_up=False - generate fire times missed while the consumer was busy, otherwise skip to the next
+			fire time after current time
+	Return:
+		async generator of datetime object
+	"""
+	compiled = compile_rulearray(rulearray)
+	last_fire = now_func() if (after is None) else after
+	while True:
+		if not catch_up:
+			last_fire = max(last_fire, now_func())
+		fire_time = next_fire_time(compiled, last_fire)
+		if fire_time is None:
+			return
+		await _sleep_until(fire_time, now_func)
+		yield fire_time
+		last_fire = fire_time
+
+
+FireReport = collections.namedtuple('FireReport', (
+		'job_id',
+		'fire_time',
+		'status',
+		'queue_delay',
+		'coalesced',
+))
+
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP = 'drop'
+OVERFLOW_COALESCE = 'coalesce'
+
+
+class _PendingFire:
+	""" (internal) fire of job waiting in the dispatch queue """
+
+	__slots__ = (
+			'job_id',
+			'fire_time',
+			'enqueued_at',
+			'coalesced',
+	)
+
+	def __init__(self, job_id, fire_time):
+		self.job_id = job_id
+		self.fire_time = fire_time
+		self.enqueued_at = time.monotonic()
+		self.coalesced = 0
+
+
+class CronDispatcher:
+	""" dispatch callbacks of due jobs to thread pool through a bounded queue
+
+	Due fires are put into a bounded queue and handed to the executor only when a worker is free and the
+	job runs fewer than its max concurrency instances, so the executor never queues work on its own. When
+	the queue is full the overflow policy applies: OVERFLOW_BLOCK waits for space, OVERFLOW_DROP drops the
+	new fire, and OVERFLOW_COALESCE merges the new fire into the latest queued fire of the same job (or
+	drops it if the job has no fire queued).
+
+	Every fire is reported to report_func as FireReport with status 'done', 'failed', 'dropped' or
+	'coalesced' and the time (in seconds) it waited in the queue.
+	"""
+
+	def __init__(self, executor=None, max_workers=4, max_queue=256, overflow_policy=OVERFLOW_BLOCK, report_func=None, now_func=datetime.datetime.now):
+		""" constructor of dispatcher.
+
+		Parameter:
+			executor=None - concurrent.futures.Executor to run callbacks, a ThreadPoolExecutor is created if None
+			max_workers=4 - number of callbacks which run at the same time
+			max_queue=256 - capacity of the dispatch queue
+			overflow_policy=OVERFLOW_BLOCK - one of OVERFLOW_BLOCK, OVERFLOW_DROP and OVERFLOW_COALESCE
+			report_func=None - function invoked with FireReport of each fire
+			now_func=datetime.datetime.now - function which gives current wall clock time-stamp
+		"""
+		if overflow_policy not in (OVERFLOW_BLOCK, OVERFLOW_DROP, OVERFLOW_COALESCE):
+			raise ValueError("unknown overflow policy: %r" % (overflow_policy, ))
+		self.own_executor = executor is None
+		if executor is None:
+			import concurrent.futures  # pylint: disable=import-outside-toplevel
+			executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+		self.executor = executor
+		self.max_workers = max_workers
+		self.max_queue = max_queue
+		self.overflow_policy = overflow_policy
+		self.report_func = report_func
+		self.now_func = now_func
+		self.scheduler = CronScheduler()
+		self.jobs = {}
+		self.running = collections.defaultdict(int)
+		self.in_flight = 0
+		self.pending = collections.deque()
+		self.pending_jobs = {}
+		self.cond = threading.Condition()
+
+	def add_job(self, job_id, rulearray, callback, max_concurrency=1, after=None):
+		""" add (or replace) a job.
+
+		Parameter:
+			job_id - hashable identifier of the job
+			rulearray - rule array generated by parse_cronstring, compiled rule array or CronSchedule object
+			callback - function invoked with the fire time in worker thread
+			max_concurrency=1 - maximum number of instances of the job running at the same time
+			after=None - schedule fires after this time-stamp, current time if None
+		Return:
+			the next fire time of the job, None if the rule never fires
+		"""
+		with self.cond:
+			self.jobs[job_id] = (callback, max(1, int(max_concurrency)))
+		return self.scheduler.add(job_id, rulearray, self.now_func() if (after is None) else after)
+
+	def remove_job(self, job_id):
+		""" remove a job, queued fires of the job are discarded. """
+		with self.cond:
+			self.jobs.pop(job_id, None)
+		return self.scheduler.remove(job_id)
+
+	def _report(self, entry, status, queue_delay):
+		if self.report_func is not None:
+			self.report_func(FireReport(entry.job_id, entry.fire_time, status, queue_delay, entry.coalesced))
+
+	def _pump(self):
+		""" (internal) hand queued fires to executor while workers are available, lock must be held """
+		if not self.pending:
+			return
+		remaining = collections.deque()
+		while self.pending:
+			entry = self.pending.popleft()
+			job = self.jobs.get(entry.job_id)
+			if job is None:
+				self.pending_jobs.pop(entry.job_id, None)
+				continue
+			if (self.in_flight >= self.max_workers) or (self.running[entry.job_id] >= job[1]):
+				remaining.append(entry)
+				continue
+			if self.pending_jobs.get(entry.job_id) is entry:
+				del self.pending_jobs[entry.job_id]
+			self.in_flight = self.in_flight + 1
+			self.running[entry.job_id] = self.running[entry.job_id] + 1
+			self.executor.submit(self._run_entry, entry, job[0])
+		self.pending = remaining
+		self.cond.notify_all()
+
+	def _run_entry(self, entry, callback):
+		queue_delay = time.monotonic() - entry.enqueued_at
+		status = 'done'
+		try:
+			callback(entry.fire_time)
+		except Exception as e:
+			_log.exception("Err: callback of job %r failed at %r: %r", entry.job_id, entry.fire_time, e)
+			status = 'failed'
+		try:
+			self._report(entry, status, queue_delay)
+		finally:
+			with self.cond:
+				self.in_flight = self.in_flight - 1
+				self.running[entry.job_id] = self.running[entry.job_id] - 1
+				self._pump()
+				self.cond.notify_all()
+
+	def _enqueue(self, job_id, fire_time):
+		status = None
+		with self.cond:
+			while len(self.pending) >= self.max_queue:
+				if self.overflow_policy == OVERFLOW_BLOCK:
+					self.cond.wait()
+					continue
+				entry = self.pending_jobs.get(job_id) if (self.overflow_policy == OVERFLOW_COALESCE) else None
+				if entry is not None:
+					entry.coalesced = entry.coalesced + 1
+					status = 'coalesced'
+				else:
+					status = 'dropped'
+				break
+			if status is None:
+				entry = _PendingFire(job_id, fire_time)
+				self.pending.append(entry)
+				self.pending_jobs[job_id] = entry
+				self._pump()
+				return True
+		self._report(_PendingFire(job_id, fire_time), status, 0.0)
+		return False
+
+	def dispatch_due(self, now=None, catch_up=True):
+		""" put fires of jobs which are due at given time-stamp into the dispatch queue.
+
+		Parameter:
+			now=None - the current time-stamp, current time if None
+			catch_up=True - queue every missed fire, otherwise only the latest missed fire of each job
+		Return:
+			number of fires queued
+		"""
+		if now is None:
+			now = self.now_func()
+		result = 0
+		for fire_time, job_id in self.scheduler.pop_due(now, catch_up):
+			if self._enqueue(job_id, fire_time):
+				result = result + 1
+		return result
+
+	def serve_forever(self, stop_event):
+		""" dispatch due jobs until given threading.Event is set.
+
+		Parameter:
+			stop_event - threading.Event to stop serving
+		"""
+		while not stop_event.is_set():
+			self.dispatch_due()
+			upcoming = self.scheduler.peek()
+			timeout = _ASYNC_SLEEP_CHUNK
+			if upcoming is not None:
+				timeout = min(timeout, max(0.0, (upcoming[0] - self.now_func()).total_seconds()))
+			stop_event.wait(timeout)
+
+	def queue_size(self):
+		""" get number of fires waiting in the dispatch queue """
+		with self.cond:
+			return len(self.pending)
+
+	def shutdown(self, wait=True):
+		""" shut down the executor if it is created by this dispatcher.
+
+		Parameter:
+			wait=True - wait until queued and running fires are finished
+		"""
+		if wait:
+			with self.cond:
+				while self.pending or self.in_flight:
+					self.cond.wait()
+		if self.own_executor:
+			self.executor.shutdown(wait)
+
+
+def get_datetime_by_cronrule(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, tstamp_start, tstamp_end, raise_error=False):
+	""" filter given time-stamp range with given rules
+
+	Parameter:
+		rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
+		tstamp_start - range start (inclusive)
+		tstamp_end - range end (exclusive)
+		raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
+	Return:
+		list of datetime object which complies to given rule array
+	"""
+	compiled = _parse_compiled_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
+	return filter_range_by_rule(compiled, tstamp_start, tstamp_end)
+
+
+def iter_datetime_by_cronrule(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, tstamp_start, tstamp_end=None, raise_error=False):
+	""" lazily generate time-stamps within given range with given rules
+
+	Parameter:
+		rule_minute, rule_hour, rule_day, rule_month, rule_weekday - cron-style rule string
+		tstamp_start - range start (inclusive)
+		tstamp_end=None - range end (exclusive), None for open-ended range
+		raise_error=False - do not raise exception on wrong syntax (still sending error message to logging module)
+	Return:
+		generator of datetime object which complies to given rule array
 	"""
-	rulearray = parse_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
-	return filter_range_by_rule(rulearray, tstamp_start, tstamp_end)
+	compiled = _parse_compiled_cronstring(rule_minute, rule_hour, rule_day, rule_month, rule_weekday, raise_error)
+	return iter_range_by_rule(compiled, tstamp_start, tstamp_end)
 
 
 # vim: ts=4 sw=4 ai nowrap
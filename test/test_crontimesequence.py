@@ -3,9 +3,22 @@
 
 import unittest
 import sys
+import bisect
+import copy
 import datetime
+import itertools
 import logging
+import pickle
+import threading
 
+try:
+	import numpy
+except ImportError:
+	numpy = None
+try:
+	import zoneinfo
+except ImportError:
+	zoneinfo = None
 # {{{ import target module according to Python version
 try:
 	import crontimesequence #@UnusedImport
@@ -18,6 +31,21 @@ except Exception:
 # }}} import target module according to Python version
 
 
+def skip_unless_provided(name):
+	""" skip test case if the target module (the Python 2 edition) does not provide given function or class """
+	return unittest.skipIf(not hasattr(crontimesequence, name), "crontimesequence.%s is not available" % (name, ))
+# ### def skip_unless_provided
+
+
+def load_tests(loader, tests, pattern):
+	""" also run asyncio integration tests, which cannot be parsed by Python 2, when running this file directly """
+	if sys.version_info >= (3, 6):
+		import test_crontimesequence_asyncio
+		tests.addTests(loader.loadTestsFromModule(test_crontimesequence_asyncio))
+	return tests
+# ### def load_tests
+
+
 
 class TestScalarValue(unittest.TestCase):
 	""" test ScalarValue class """
@@ -253,6 +281,49 @@ class TestNthWeekdayOfMonthValue(unittest.TestCase):
 # ### class TestNthWeekdayOfMonthValue
 
 
+@skip_unless_provided("MonthDayRule")
+class TestMonthDayRule(unittest.TestCase):
+	""" test per-month cache of MonthDayRule based classes """
+
+	def test_day_mask_1999_2030(self):
+		""" check if cached day masks agree with date arithmetic """
+
+		rule_last_day = crontimesequence.LastDayOfMonthValue()
+		rule_last_fri = crontimesequence.LastWeekdayOfMonthValue(5)
+		rule_2nd_sun = crontimesequence.NthWeekdayOfMonthValue(0, 2)
+		rule_5th_wed = crontimesequence.NthWeekdayOfMonthValue(3, 5)
+		for year in range(1999, 2031):
+			for month in range(1, 13):
+				d = datetime.date(year, month, 1)
+				while d.month == month:
+					nextweek = d + datetime.timedelta(days=7)
+					prevweek = d - datetime.timedelta(days=7)
+					dt = datetime.datetime(d.year, d.month, d.day, 13, 7)
+					self.assertEqual(rule_last_day.is_accept(dt), (d + datetime.timedelta(days=1)).day == 1)
+					self.assertEqual(rule_last_fri.is_accept(dt), (d.isoweekday() == 5) and (nextweek.month != month))
+					self.assertEqual(rule_2nd_sun.is_accept(dt), (d.isoweekday() == 7) and (8 <= d.day <= 14))
+					self.assertEqual(rule_5th_wed.is_accept(dt), (d.isoweekday() == 3) and (d.day > 28) and (prevweek.month == month))
+					d = d + datetime.timedelta(days=1)
+	# ### def test_day_mask_1999_2030
+
+	def test_cache_is_bounded(self):
+		""" check if month cache evicts least recently used month """
+
+		rule = crontimesequence.NearestWorkDayValue(15)
+		for year in range(2000, 2040):
+			for month in range(1, 13):
+				rule.day_mask_of_month(year, month)
+		cache_info = rule._month_cache.info()  # pylint: disable=protected-access
+		self.assertEqual(cache_info.currsize, crontimesequence._MONTH_CACHE_SIZE)  # pylint: disable=protected-access
+		self.assertEqual(cache_info.evictions, 40 * 12 - crontimesequence._MONTH_CACHE_SIZE)  # pylint: disable=protected-access
+		self.assertTrue((2039, 12) in rule._month_cache.entries)  # pylint: disable=protected-access
+		self.assertFalse((2000, 1) in rule._month_cache.entries)  # pylint: disable=protected-access
+		self.assertEqual(rule.day_mask_of_month(2012, 9), 1 << 14)
+		self.assertEqual(rule.day_mask_of_month(2012, 4), 1 << 16)
+	# ### def test_cache_is_bounded
+# ### class TestMonthDayRule
+
+
 
 def is_rule_dateset_compatible(testcase, ruleset, dateset, expret, msg=None):
 	""" check if every date in dataset can have expected acceptable test result with given rule object
@@ -2773,6 +2844,1245 @@ class Test_IntegratingFunction(unittest.TestCase):
 # ### class Test_IntegratingFunction
 
 
+def scan_range_by_rule_minutely(rulearray, tstamp_start, tstamp_end):
+	""" reference implementation which checks every minute in given range with check_timestamp_by_rule """
+	increment_delta = datetime.timedelta(minutes=1)
+	d = datetime.datetime(tstamp_start.year, tstamp_start.month, tstamp_start.day, tstamp_start.hour, tstamp_start.minute)
+	result = []
+	while d < tstamp_end:
+		if crontimesequence.check_timestamp_by_rule(rulearray, d):
+			result.append(d)
+		d = d + increment_delta
+	return result
+# ### def scan_range_by_rule_minutely
+
+
+REFERENCE_CRONRULES = (
+		("*", "*", "*", "*", "*"),
+		("19", "*/3", "*", "*", "*"),
+		("0", "3", "1", "*", "*"),
+		("*/7", "1-3", "L", "*", "*"),
+		("5", "4", "15W", "*", "*"),
+		("0", "0", "*", "*", "5L"),
+		("30", "12", "*", "2,3", "1#2"),
+		("0", "0", "29", "2", "*"),
+		("*/15", "*", "*", "*", "0,6"),
+		("0", "0", "31", "2", "*"),
+)
+
+
+@skip_unless_provided("next_fire_time")
+class Test_FieldSkippingEngine(unittest.TestCase):
+	""" test next_fire_time and the field-skipping range filter """
+
+	def test_filter_range_equal_to_minutely_scan(self):
+		""" check if filter_range_by_rule gives the same result as minute-by-minute scanning """
+
+		d_s = datetime.datetime(2011, 12, 30, 22, 47, 13)
+		d_e = datetime.datetime(2012, 3, 5, 1, 2)
+		for rule in REFERENCE_CRONRULES:
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			self.assertEqual(crontimesequence.filter_range_by_rule(rulearray, d_s, d_e), scan_range_by_rule_minutely(rulearray, d_s, d_e), rule)
+	# ### def test_filter_range_equal_to_minutely_scan
+
+	def test_next_fire_time(self):
+		""" check if next_fire_time find the first time-stamp strictly after given one """
+
+		rulearray = crontimesequence.parse_cronstring("0", "3", "1", "*", "*")
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, datetime.datetime(2012, 1, 1, 3, 0)), datetime.datetime(2012, 2, 1, 3, 0))
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, datetime.datetime(2012, 1, 1, 2, 59, 59)), datetime.datetime(2012, 1, 1, 3, 0))
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, datetime.datetime(2012, 12, 31, 23, 59)), datetime.datetime(2013, 1, 1, 3, 0))
+
+		rulearray = crontimesequence.parse_cronstring("0", "0", "29", "2", "*")
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, datetime.datetime(2012, 3, 1)), datetime.datetime(2016, 2, 29, 0, 0))
+	# ### def test_next_fire_time
+
+	def test_next_fire_time_unreachable(self):
+		""" check if next_fire_time returns None for rule which never fires """
+
+		rulearray = crontimesequence.parse_cronstring("0", "0", "31", "2", "*")
+		self.assertTrue(crontimesequence.next_fire_time(rulearray, datetime.datetime(2012, 3, 1)) is None)
+		rulearray = crontimesequence.parse_cronstring("x", "*", "*", "*", "*")
+		self.assertTrue(crontimesequence.next_fire_time(rulearray, datetime.datetime(2012, 3, 1)) is None)
+	# ### def test_next_fire_time_unreachable
+
+	def test_next_fire_time_near_datetime_max(self):
+		""" check if next_fire_time returns None instead of overflowing at the end of datetime range """
+
+		rulearray = crontimesequence.parse_cronstring("*", "*", "*", "*", "*")
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, datetime.datetime(9999, 12, 31, 23, 58, 30)), datetime.datetime(9999, 12, 31, 23, 59))
+		self.assertTrue(crontimesequence.next_fire_time(rulearray, datetime.datetime(9999, 12, 31, 23, 59)) is None)
+		self.assertTrue(crontimesequence.next_fire_time(rulearray, datetime.datetime.max) is None)
+	# ### def test_next_fire_time_near_datetime_max
+
+	def test_yearly_range_of_monthly_rule(self):
+		""" check if a year of 0 3 1 * * rule gives 12 time-stamps """
+
+		result = crontimesequence.get_datetime_by_cronrule("0", "3", "1", "*", "*", datetime.datetime(2000, 1, 1), datetime.datetime(2001, 1, 1))
+		self.assertEqual(result, [datetime.datetime(2000, m, 1, 3, 0) for m in range(1, 13)])
+	# ### def test_yearly_range_of_monthly_rule
+# ### class Test_FieldSkippingEngine
+
+
+@skip_unless_provided("previous_fire_time")
+class Test_ReverseSearch(unittest.TestCase):
+	""" test previous_fire_time and iter_reverse_range_by_rule """
+
+	def test_reverse_range_equal_to_minutely_scan(self):
+		""" check if iter_reverse_range_by_rule gives the reversed result of minute-by-minute scanning """
+
+		d_s = datetime.datetime(2011, 12, 30, 22, 47, 13)
+		d_e = datetime.datetime(2012, 3, 5, 1, 2)
+		for rule in REFERENCE_CRONRULES:
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			result = list(crontimesequence.iter_reverse_range_by_rule(rulearray, d_s, d_e))
+			self.assertEqual(result, scan_range_by_rule_minutely(rulearray, d_s, d_e)[::-1], rule)
+	# ### def test_reverse_range_equal_to_minutely_scan
+
+	def test_previous_fire_time(self):
+		""" check if previous_fire_time find the last time-stamp strictly before given one """
+
+		rulearray = crontimesequence.parse_cronstring("0", "3", "1", "*", "*")
+		self.assertEqual(crontimesequence.previous_fire_time(rulearray, datetime.datetime(2012, 1, 1, 3, 0)), datetime.datetime(2011, 12, 1, 3, 0))
+		self.assertEqual(crontimesequence.previous_fire_time(rulearray, datetime.datetime(2012, 1, 1, 3, 0, 1)), datetime.datetime(2012, 1, 1, 3, 0))
+
+		rulearray = crontimesequence.parse_cronstring("0", "0", "29", "2", "*")
+		self.assertEqual(crontimesequence.previous_fire_time(rulearray, datetime.datetime(2012, 2, 28)), datetime.datetime(2008, 2, 29, 0, 0))
+
+		rulearray = crontimesequence.parse_cronstring("0", "0", "31", "2", "*")
+		self.assertTrue(crontimesequence.previous_fire_time(rulearray, datetime.datetime(2012, 3, 1)) is None)
+	# ### def test_previous_fire_time
+
+	def test_open_ended_reverse_range(self):
+		""" check if iter_reverse_range_by_rule lazily goes back without lower limit """
+
+		rulearray = crontimesequence.parse_cronstring("0", "0", "1", "1", "*")
+		result = crontimesequence.iter_reverse_range_by_rule(rulearray, None, datetime.datetime(2012, 1, 1))
+		self.assertEqual(next(result), datetime.datetime(2011, 1, 1))
+		self.assertEqual(next(result), datetime.datetime(2010, 1, 1))
+	# ### def test_open_ended_reverse_range
+# ### class Test_ReverseSearch
+
+
+@skip_unless_provided("iter_range_by_rule")
+class Test_LazyRange(unittest.TestCase):
+	""" test iter_range_by_rule and iter_datetime_by_cronrule """
+
+	def test_iter_range_equal_to_filter_range(self):
+		""" check if iter_range_by_rule yields the same time-stamps as filter_range_by_rule """
+
+		d_s = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		d_e = datetime.datetime(2012, 8, 22, 23, 5, 27)
+		for rule in REFERENCE_CRONRULES:
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			result = crontimesequence.iter_range_by_rule(rulearray, d_s, d_e)
+			self.assertFalse(isinstance(result, list))
+			self.assertEqual(list(result), crontimesequence.filter_range_by_rule(rulearray, d_s, d_e), rule)
+	# ### def test_iter_range_equal_to_filter_range
+
+	def test_open_ended_range(self):
+		""" check if open-ended range can be consumed lazily """
+
+		d_s = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		result = crontimesequence.iter_datetime_by_cronrule("*", "*", "*", "*", "*", d_s)
+		self.assertEqual(next(result), datetime.datetime(2012, 7, 20, 10, 39))
+		self.assertEqual(next(result), datetime.datetime(2012, 7, 20, 10, 40))
+
+		result = crontimesequence.iter_datetime_by_cronrule("19", "*/3", "*", "*", "*", d_s, None, True)
+		self.assertEqual([next(result) for _i in range(3)], [
+				datetime.datetime(2012, 7, 20, 12, 19),
+				datetime.datetime(2012, 7, 20, 15, 19),
+				datetime.datetime(2012, 7, 20, 18, 19),
+		])
+	# ### def test_open_ended_range
+# ### class Test_LazyRange
+
+
+@skip_unless_provided("compile_rulearray")
+class Test_CompiledRuleArray(unittest.TestCase):
+	""" test compile_rulearray and CompiledRuleArray class """
+
+	def test_bitmask_of_fields(self):
+		""" check if rule sets are compiled into expected bitmasks """
+
+		compiled = crontimesequence.compile_rulearray(crontimesequence.parse_cronstring("*/15", "1-3", "L,5", "*", "0,6"))
+		self.assertEqual(compiled.minute_mask, (1 << 0) | (1 << 15) | (1 << 30) | (1 << 45))
+		self.assertEqual(compiled.hour_mask, 0xE)
+		self.assertEqual(compiled.day_mask, 1 << 5)
+		self.assertEqual(len(compiled.day_rules), 1)
+		self.assertEqual(compiled.month_mask, 0x1FFE)
+		self.assertEqual(compiled.weekday_mask, (1 << 7) | (1 << 6))
+		self.assertEqual(compiled.weekday_rules, ())
+		self.assertEqual(compiled.minute_values, (0, 15, 30, 45))
+		self.assertTrue(compiled.is_field_skippable)
+		self.assertTrue(crontimesequence.compile_rulearray(compiled) is compiled)
+	# ### def test_bitmask_of_fields
+
+	def test_check_timestamp_equal_to_rule_objects(self):
+		""" check if compiled rule array accepts the same time-stamps as rule objects """
+
+		for rule in REFERENCE_CRONRULES:
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			compiled = crontimesequence.compile_rulearray(rulearray)
+			d = datetime.datetime(2011, 12, 1, 0, 0, 7)
+			while d < datetime.datetime(2012, 4, 1):
+				self.assertEqual(crontimesequence.check_timestamp_by_rule(compiled, d), crontimesequence.check_timestamp_by_rule(rulearray, d), (rule, d))
+				d = d + datetime.timedelta(minutes=13)
+	# ### def test_check_timestamp_equal_to_rule_objects
+
+	def test_custom_rule_object(self):
+		""" check if rule objects other than ScalarValue in minute field fall back to minute scanning """
+
+		rulearray = (
+				(crontimesequence.LastDayOfMonthValue(), ),
+				crontimesequence.parse_cronstring_hour("3"),
+				None,
+				None,
+				None,
+		)
+		compiled = crontimesequence.compile_rulearray(rulearray)
+		self.assertFalse(compiled.is_field_skippable)
+		d_s = datetime.datetime(2012, 1, 30, 0, 0)
+		d_e = datetime.datetime(2012, 2, 2, 0, 0)
+		result = crontimesequence.filter_range_by_rule(compiled, d_s, d_e)
+		self.assertEqual(len(result), 60)
+		self.assertEqual(result, scan_range_by_rule_minutely(rulearray, d_s, d_e))
+	# ### def test_custom_rule_object
+
+	def test_repr_method_work(self):
+		""" check if __repr__ method work """
+
+		compiled = crontimesequence.compile_rulearray(crontimesequence.parse_cronstring("0", "3", "*", "*", "5L"))
+		self.assertTrue("CompiledRuleArray" in repr(compiled))
+	# ### def test_repr_method_work
+# ### class Test_CompiledRuleArray
+
+
+@skip_unless_provided("CronSchedule")
+class Test_CronSchedule(unittest.TestCase):
+	""" test CronSchedule class """
+
+	def test_query_methods(self):
+		""" check if query methods of CronSchedule give the same result as module functions """
+
+		d_s = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		d_e = datetime.datetime(2012, 8, 22, 23, 5, 27)
+		for rule in REFERENCE_CRONRULES:
+			schedule = crontimesequence.CronSchedule(*rule)
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			expect = crontimesequence.filter_range_by_rule(rulearray, d_s, d_e)
+			self.assertEqual(list(schedule.iter_range(d_s, d_e)), expect, rule)
+			self.assertEqual(schedule.count_range(d_s, d_e), len(expect), rule)
+			self.assertEqual(schedule.next_after(d_s), crontimesequence.next_fire_time(rulearray, d_s), rule)
+			self.assertEqual(schedule.previous_before(d_e), crontimesequence.previous_fire_time(rulearray, d_e), rule)
+			for d in expect:
+				self.assertTrue(schedule.is_accept(d))
+	# ### def test_query_methods
+
+	def test_immutable_and_hashable(self):
+		""" check if CronSchedule object is immutable and hashable """
+
+		schedule = crontimesequence.CronSchedule("19", "*/3", "*", "*", "*")
+		self.assertEqual(schedule, crontimesequence.CronSchedule(19, " */3", "*", "*", "*"))
+		self.assertNotEqual(schedule, crontimesequence.CronSchedule("19", "*/4", "*", "*", "*"))
+		self.assertEqual(len(set([schedule, crontimesequence.CronSchedule("19", "*/3", "*", "*", "*")])), 1)
+		with self.assertRaises(AttributeError):
+			schedule.rules = ("*", "*", "*", "*", "*")
+		with self.assertRaises(AttributeError):
+			schedule.extra = 1
+		with self.assertRaises(AttributeError):
+			del schedule.compiled
+	# ### def test_immutable_and_hashable
+
+	def test_pickle_and_copy(self):
+		""" check if CronSchedule object can be pickled and copied """
+
+		schedule = crontimesequence.CronSchedule("19", "*/3", "L", "*", "*")
+		restored = pickle.loads(pickle.dumps(schedule))
+		self.assertEqual(restored, schedule)
+		self.assertEqual(restored.next_after(datetime.datetime(2012, 2, 1)), datetime.datetime(2012, 2, 29, 0, 19))
+		self.assertTrue(copy.copy(schedule) is schedule)
+		self.assertTrue(copy.deepcopy([schedule])[0] is schedule)
+	# ### def test_pickle_and_copy
+
+	def test_use_as_rulearray(self):
+		""" check if CronSchedule object can be given where rule array is expected """
+
+		schedule = crontimesequence.CronSchedule("0", "3", "1", "*", "*")
+		d_s = datetime.datetime(2000, 1, 1)
+		d_e = datetime.datetime(2001, 1, 1)
+		self.assertEqual(len(crontimesequence.filter_range_by_rule(schedule, d_s, d_e)), 12)
+		self.assertTrue(crontimesequence.check_timestamp_by_rule(schedule, datetime.datetime(2000, 5, 1, 3, 0)))
+	# ### def test_use_as_rulearray
+
+	def test_repr_method_work(self):
+		""" check if __repr__ method work """
+
+		schedule = crontimesequence.CronSchedule("0", "3", "1", "*", "*")
+		self.assertTrue("CronSchedule('0', '3', '1', '*', '*')" in repr(schedule))
+	# ### def test_repr_method_work
+# ### class Test_CronSchedule
+
+
+@skip_unless_provided("compile_rulearray")
+class Test_MinuteOfDayTemplate(unittest.TestCase):
+	""" test minute-of-day template based range generation """
+
+	def test_template_values(self):
+		""" check if minute-of-day template is built from hour and minute rule sets """
+
+		compiled = crontimesequence.compile_rulearray(crontimesequence.parse_cronstring("*/20", "9,17", "*", "*", "*"))
+		self.assertEqual(compiled.minute_of_day_values, (540, 560, 580, 1020, 1040, 1060))
+		self.assertEqual(compiled.minute_of_day_deltas[1], datetime.timedelta(hours=9, minutes=20))
+	# ### def test_template_values
+
+	def test_business_hours(self):
+		""" check if */5 9-17 * * 1-5 rule gives the same result as minute-by-minute scanning on partial days """
+
+		rulearray = crontimesequence.parse_cronstring("*/5", "9-17", "*", "*", "1-5")
+		d_s = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		d_e = datetime.datetime(2012, 8, 22, 13, 5, 27)
+		expect = scan_range_by_rule_minutely(rulearray, d_s, d_e)
+		self.assertEqual(crontimesequence.filter_range_by_rule(rulearray, d_s, d_e), expect)
+		self.assertEqual(list(crontimesequence.iter_reverse_range_by_rule(rulearray, d_s, d_e)), expect[::-1])
+		self.assertEqual(len(crontimesequence.filter_range_by_rule(rulearray, datetime.datetime(2012, 1, 1), datetime.datetime(2013, 1, 1))), 261 * 108)
+	# ### def test_business_hours
+# ### class Test_MinuteOfDayTemplate
+
+
+@skip_unless_provided("disable_parse_cache")
+class Test_ParseCache(unittest.TestCase):
+	""" test opt-in parse cache """
+
+	def tearDown(self):
+		crontimesequence.disable_parse_cache()
+
+	def test_disabled_by_default(self):
+		""" check if parse cache is not enabled unless asked """
+
+		self.assertTrue(crontimesequence.parse_cache_info() is None)
+		rulearray_1 = crontimesequence.parse_cronstring("19", "*/3", "*", "*", "*")
+		rulearray_2 = crontimesequence.parse_cronstring("19", "*/3", "*", "*", "*")
+		self.assertFalse(rulearray_1 is rulearray_2)
+	# ### def test_disabled_by_default
+
+	def test_hit_miss_eviction(self):
+		""" check if parse results are cached with statistics """
+
+		crontimesequence.enable_parse_cache(2)
+		rulearray_1 = crontimesequence.parse_cronstring("19", "*/3", "*", "*", "*")
+		rulearray_2 = crontimesequence.parse_cronstring(19, " */3 ", "*", "*", "*")
+		self.assertTrue(rulearray_1 is rulearray_2)
+		self.assertFalse(crontimesequence.parse_cronstring("19", "*/3", "*", "*", "*", True) is rulearray_1)
+		crontimesequence.parse_cronstring("0", "0", "*", "*", "*")
+		self.assertEqual(crontimesequence.parse_cache_info(), crontimesequence.CacheInfo(1, 3, 1, 2, 2))
+		crontimesequence.clear_parse_cache()
+		self.assertEqual(crontimesequence.parse_cache_info(), crontimesequence.CacheInfo(0, 0, 0, 0, 2))
+	# ### def test_hit_miss_eviction
+
+	def test_get_datetime_with_cache(self):
+		""" check if get_datetime_by_cronrule gives the same result with parse cache enabled """
+
+		d_s = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		d_e = datetime.datetime(2012, 7, 22, 23, 5, 27)
+		expect = crontimesequence.get_datetime_by_cronrule("19", "*/3", "*", "*", "*", d_s, d_e)
+		crontimesequence.enable_parse_cache()
+		self.assertEqual(crontimesequence.get_datetime_by_cronrule("19", "*/3", "*", "*", "*", d_s, d_e), expect)
+		self.assertEqual(crontimesequence.get_datetime_by_cronrule("19", "*/3", "*", "*", "*", d_s, d_e), expect)
+		self.assertEqual(crontimesequence.parse_cache_info().hits, 1)
+	# ### def test_get_datetime_with_cache
+# ### class Test_ParseCache
+
+
+@skip_unless_provided("count_range_by_rule")
+class Test_CountRange(unittest.TestCase):
+	""" test count_range_by_rule function """
+
+	def test_count_equal_to_filter_range(self):
+		""" check if counting agrees with length of filtered range on partial days """
+
+		ranges = (
+				(datetime.datetime(2011, 12, 30, 22, 47, 13), datetime.datetime(2012, 3, 5, 1, 2)),
+				(datetime.datetime(2012, 2, 13, 12, 30), datetime.datetime(2012, 2, 13, 12, 30, 1)),
+				(datetime.datetime(2012, 2, 13, 12, 30), datetime.datetime(2012, 2, 13, 12, 30)),
+				(datetime.datetime(2012, 1, 31, 0, 0), datetime.datetime(2012, 2, 1, 0, 0)),
+				(datetime.datetime(2012, 3, 5, 1, 2), datetime.datetime(2011, 12, 30, 22, 47, 13)),
+		)
+		for rule in REFERENCE_CRONRULES:
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			for d_s, d_e in ranges:
+				expect = len(crontimesequence.filter_range_by_rule(rulearray, d_s, d_e))
+				self.assertEqual(crontimesequence.count_range_by_rule(rulearray, d_s, d_e), expect, (rule, d_s, d_e))
+	# ### def test_count_equal_to_filter_range
+
+	def test_count_decade(self):
+		""" check if counting 10 years of every minute gives the number of minutes """
+
+		rulearray = crontimesequence.parse_cronstring("*", "*", "*", "*", "*")
+		d_s = datetime.datetime(2000, 1, 1)
+		d_e = datetime.datetime(2010, 1, 1)
+		self.assertEqual(crontimesequence.count_range_by_rule(rulearray, d_s, d_e), (d_e - d_s).days * 1440)
+	# ### def test_count_decade
+# ### class Test_CountRange
+
+
+@skip_unless_provided("mask_by_rule")
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class Test_mask_by_rule(unittest.TestCase):
+	""" test NumPy-vectorised mask_by_rule function """
+
+	def test_mask_equal_to_check_timestamp(self):
+		""" check if vectorised evaluation agrees with check_timestamp_by_rule """
+
+		base = numpy.datetime64("2011-12-01T00:00:00", "s")
+		tstamps = base + numpy.arange(0, 130 * 86400, 317)
+		tstamps[3] = numpy.datetime64("NaT")
+		for rule in REFERENCE_CRONRULES + (("*/5", "9-17", "*", "*", "1-5"), ):
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			result = crontimesequence.mask_by_rule(rulearray, tstamps)
+			self.assertEqual(result.shape, tstamps.shape)
+			self.assertFalse(result[3])
+			for idx in range(0, len(tstamps)):
+				if idx != 3:
+					self.assertEqual(bool(result[idx]), crontimesequence.check_timestamp_by_rule(rulearray, tstamps[idx].astype(datetime.datetime)), (rule, tstamps[idx]))
+	# ### def test_mask_equal_to_check_timestamp
+
+	def test_datetime_list_and_custom_rule(self):
+		""" check if list of datetime and rule array with custom rule object are accepted """
+
+		tstamps = [datetime.datetime(2012, 1, 31, 3, 59, 30), datetime.datetime(2012, 1, 30, 3, 0), datetime.datetime(2012, 2, 29, 3, 12)]
+		rulearray = (
+				(crontimesequence.LastDayOfMonthValue(), ),
+				crontimesequence.parse_cronstring_hour("3"),
+				None,
+				None,
+				None,
+		)
+		self.assertEqual(crontimesequence.mask_by_rule(rulearray, tstamps).tolist(), [True, False, True])
+		rulearray = crontimesequence.parse_cronstring("59", "3", "L", "*", "*")
+		self.assertEqual(crontimesequence.mask_by_rule(rulearray, tstamps).tolist(), [True, False, False])
+	# ### def test_datetime_list_and_custom_rule
+# ### class Test_mask_by_rule
+
+
+@skip_unless_provided("check_timestamps_by_rule")
+class Test_check_timestamps_by_rule(unittest.TestCase):
+	""" test check_timestamps_by_rule function """
+
+	def test_batch_equal_to_check_timestamp(self):
+		""" check if batch check agrees with check_timestamp_by_rule on unsorted time-stamps """
+
+		tstamps = [datetime.datetime(2012, 1, 1) + datetime.timedelta(minutes=((v * 7919) % (120 * 1440))) for v in range(0, 5000)]
+		for rule in REFERENCE_CRONRULES:
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			expect = [crontimesequence.check_timestamp_by_rule(rulearray, d) for d in tstamps]
+			self.assertEqual(crontimesequence.check_timestamps_by_rule(rulearray, tstamps), expect, rule)
+			self.assertEqual(crontimesequence.check_timestamps_by_rule(rulearray, iter(tstamps), True), [d for d, r in zip(tstamps, expect) if r], rule)
+	# ### def test_batch_equal_to_check_timestamp
+
+	def test_custom_rule(self):
+		""" check if rule array with custom rule object is accepted """
+
+		rulearray = (
+				(crontimesequence.LastDayOfMonthValue(), ),
+				None,
+				None,
+				None,
+				None,
+		)
+		tstamps = [datetime.datetime(2012, 1, 31, 3, 59, 30), datetime.datetime(2012, 1, 30, 3, 0)]
+		self.assertEqual(crontimesequence.check_timestamps_by_rule(rulearray, tstamps), [True, False])
+		self.assertEqual(crontimesequence.check_timestamps_by_rule(rulearray, tstamps, accepted_only=True), tstamps[:1])
+	# ### def test_custom_rule
+# ### class Test_check_timestamps_by_rule
+
+
+@skip_unless_provided("RuleIndex")
+class Test_RuleIndex(unittest.TestCase):
+	""" test RuleIndex class """
+
+	def test_matching_equal_to_check_timestamp(self):
+		""" check if indexed lookup agrees with checking every rule array """
+
+		rulearrays = {}
+		index = crontimesequence.RuleIndex()
+		for job_id, rule in enumerate(REFERENCE_CRONRULES + (("*/5", "9-17", "*", "*", "1-5"), ("0", "*", "L", "*", "5L"))):
+			rulearrays[job_id] = crontimesequence.parse_cronstring(*rule)
+			index.add(job_id, rulearrays[job_id])
+		rulearrays["custom"] = ((crontimesequence.LastDayOfMonthValue(), ), None, None, None, None)
+		index.add("custom", rulearrays["custom"])
+		self.assertEqual(len(index), 13)
+		d = datetime.datetime(2011, 12, 25, 0, 0)
+		while d < datetime.datetime(2012, 3, 5):
+			expect = set([job_id for job_id, rulearray in rulearrays.items() if crontimesequence.check_timestamp_by_rule(rulearray, d)])
+			self.assertEqual(index.matching(d), expect, d)
+			d = d + datetime.timedelta(minutes=29)
+	# ### def test_matching_equal_to_check_timestamp
+
+	def test_add_remove_replace(self):
+		""" check if jobs can be removed and replaced """
+
+		index = crontimesequence.RuleIndex()
+		d = datetime.datetime(2012, 7, 20, 3, 19)
+		index.add("a", crontimesequence.parse_cronstring("19", "*/3", "*", "*", "*"))
+		index.add("b", crontimesequence.CronSchedule("19", "3", "*", "*", "5"))
+		self.assertEqual(index.matching(d), set(["a", "b"]))
+		index.add("a", crontimesequence.parse_cronstring("20", "*/3", "*", "*", "*"))
+		self.assertEqual(index.matching(d), set(["b"]))
+		self.assertTrue(index.remove("b"))
+		self.assertFalse(index.remove("b"))
+		self.assertFalse("b" in index)
+		self.assertEqual(index.matching(d), set())
+		self.assertEqual(index.matching(d + datetime.timedelta(minutes=1)), set(["a"]))
+	# ### def test_add_remove_replace
+# ### class Test_RuleIndex
+
+
+@skip_unless_provided("next_fire_times")
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class Test_next_fire_times(unittest.TestCase):
+	""" test RuleTable class and NumPy-vectorised next_fire_times function """
+
+	def test_equal_to_next_fire_time(self):
+		""" check if vectorised next fire times agree with next_fire_time of every rule array """
+
+		rules = REFERENCE_CRONRULES + (
+				("*/5", "9-17", "*", "*", "1-5"),
+				("59", "23", "31", "12", "*"),
+				("0", "0", "29", "2", "1"),
+				("3", "*", "13", "*", "5"),
+				("x", "*", "*", "*", "*"),
+		)
+		rulearrays = [crontimesequence.parse_cronstring(*rule) for rule in rules]
+		table = crontimesequence.RuleTable(rulearrays)
+		self.assertEqual(len(table), len(rules))
+		afters = [datetime.datetime(2011, 12, 30, 22, 47, 13), datetime.datetime(2012, 2, 29, 23, 59), datetime.datetime(2012, 12, 31, 23, 59, 30)]
+		afters.extend([datetime.datetime(2011, 1, 1) + datetime.timedelta(minutes=(v * 104729)) for v in range(0, 40)])
+		for after in afters:
+			result = crontimesequence.next_fire_times(table, after)
+			for rule, rulearray, v in zip(rules, rulearrays, result):
+				expect = crontimesequence.next_fire_time(rulearray, after)
+				if expect is None:
+					self.assertTrue(numpy.isnat(v), (rule, after))
+				else:
+					self.assertEqual(v.astype(datetime.datetime), expect, (rule, after))
+	# ### def test_equal_to_next_fire_time
+# ### class Test_next_fire_times
+
+
+@skip_unless_provided("CronScheduler")
+class Test_CronScheduler(unittest.TestCase):
+	""" test heap-based CronScheduler class """
+
+	scheduler_class = getattr(crontimesequence, "CronScheduler", None)
+
+	def test_pop_due_in_order(self):
+		""" check if due jobs are popped in fire time order and rescheduled """
+
+		after = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		scheduler = self.scheduler_class()
+		self.assertEqual(scheduler.add("every-3h", crontimesequence.parse_cronstring("19", "*/3", "*", "*", "*"), after), datetime.datetime(2012, 7, 20, 12, 19))
+		scheduler.add("hourly", crontimesequence.CronSchedule("0", "*", "*", "*", "*"), after)
+		self.assertTrue(scheduler.add("never", crontimesequence.parse_cronstring("0", "0", "31", "2", "*"), after) is None)
+		self.assertEqual(len(scheduler), 3)
+		self.assertEqual(scheduler.peek(), (datetime.datetime(2012, 7, 20, 11, 0), "hourly"))
+		self.assertEqual(scheduler.pop_due(datetime.datetime(2012, 7, 20, 10, 59)), [])
+		self.assertEqual(scheduler.pop_due(datetime.datetime(2012, 7, 20, 12, 19)), [
+				(datetime.datetime(2012, 7, 20, 11, 0), "hourly"),
+				(datetime.datetime(2012, 7, 20, 12, 0), "hourly"),
+				(datetime.datetime(2012, 7, 20, 12, 19), "every-3h"),
+		])
+		self.assertEqual(scheduler.next_fire_time_of("every-3h"), datetime.datetime(2012, 7, 20, 15, 19))
+		self.assertEqual(scheduler.pop_due(datetime.datetime(2012, 7, 20, 16, 30), catch_up=False), [
+				(datetime.datetime(2012, 7, 20, 13, 0), "hourly"),
+				(datetime.datetime(2012, 7, 20, 15, 19), "every-3h"),
+		])
+		self.assertEqual(scheduler.next_fire_time_of("hourly"), datetime.datetime(2012, 7, 20, 17, 0))
+	# ### def test_pop_due_in_order
+
+	def test_remove_and_replace(self):
+		""" check if jobs can be removed and replaced at runtime """
+
+		after = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		scheduler = self.scheduler_class()
+		scheduler.add("a", crontimesequence.parse_cronstring("40", "*", "*", "*", "*"), after)
+		scheduler.add("b", crontimesequence.parse_cronstring("45", "*", "*", "*", "*"), after)
+		self.assertTrue(scheduler.remove("a"))
+		self.assertFalse(scheduler.remove("a"))
+		self.assertFalse("a" in scheduler)
+		self.assertEqual(scheduler.peek(), (datetime.datetime(2012, 7, 20, 10, 45), "b"))
+		scheduler.replace("b", crontimesequence.parse_cronstring("50", "*", "*", "*", "*"), after)
+		self.assertEqual(scheduler.pop_due(datetime.datetime(2012, 7, 20, 11, 0)), [(datetime.datetime(2012, 7, 20, 10, 50), "b")])
+		self.assertTrue(scheduler.remove("b"))
+		self.assertTrue(scheduler.peek() is None)
+	# ### def test_remove_and_replace
+# ### class Test_CronScheduler
+
+
+@skip_unless_provided("TimingWheelScheduler")
+class Test_TimingWheelScheduler(Test_CronScheduler):
+	""" test TimingWheelScheduler class """
+
+	scheduler_class = getattr(crontimesequence, "TimingWheelScheduler", None)
+
+	def test_same_as_heap_scheduler(self):
+		""" check if timing wheel reports the same fires as heap across hour, day and block boundaries """
+
+		schedules = [crontimesequence.CronSchedule(*rule) for rule in REFERENCE_CRONRULES[1:] + (("0", "0", "1", "1", "*"), )]
+		now = datetime.datetime(2011, 12, 30, 22, 47, 13)
+		heap_scheduler = crontimesequence.CronScheduler()
+		wheel_scheduler = crontimesequence.TimingWheelScheduler()
+		for job_id, schedule in enumerate(schedules):
+			after = now - datetime.timedelta(minutes=(job_id * 97))
+			self.assertEqual(heap_scheduler.add(job_id, schedule, after), wheel_scheduler.add(job_id, schedule, after))
+		for step, minutes in enumerate((0, 1, 59, 61, 1439, 1441, 3000, 40000, 800000, 5, 2000000)):
+			now = now + datetime.timedelta(minutes=minutes)
+			catch_up = (minutes < 10000)
+			if step == 4:
+				late_after = now - datetime.timedelta(days=3)
+				self.assertEqual(heap_scheduler.add("late", schedules[0], late_after), wheel_scheduler.add("late", schedules[0], late_after))
+			self.assertEqual(heap_scheduler.peek()[0], wheel_scheduler.peek()[0])
+			expect = heap_scheduler.pop_due(now, catch_up)
+			result = wheel_scheduler.pop_due(now, catch_up)
+			self.assertEqual([v[0] for v in result], [v[0] for v in expect])
+			self.assertEqual(sorted(result, key=repr), sorted(expect, key=repr))
+	# ### def test_same_as_heap_scheduler
+
+	def test_peek_overdue(self):
+		""" check if peek skips removed overdue jobs and falls back to the wheel """
+
+		now = datetime.datetime(2012, 7, 20, 10, 39)
+		scheduler = crontimesequence.TimingWheelScheduler()
+		scheduler.add("hourly", crontimesequence.CronSchedule("0", "*", "*", "*", "*"), now)
+		scheduler.pop_due(now)
+		scheduler.add("late-1", crontimesequence.CronSchedule("0", "3", "*", "*", "*"), now - datetime.timedelta(days=3))
+		scheduler.add("late-2", crontimesequence.CronSchedule("0", "4", "*", "*", "*"), now - datetime.timedelta(days=3))
+		self.assertEqual(scheduler.peek(), (datetime.datetime(2012, 7, 18, 3, 0), "late-1"))
+		scheduler.remove("late-1")
+		self.assertEqual(scheduler.peek(), (datetime.datetime(2012, 7, 18, 4, 0), "late-2"))
+		scheduler.remove("late-2")
+		self.assertEqual(scheduler.peek(), (datetime.datetime(2012, 7, 20, 11, 0), "hourly"))
+		self.assertEqual(scheduler.overdue, [])
+	# ### def test_peek_overdue
+# ### class Test_TimingWheelScheduler
+
+
+@skip_unless_provided("CronDispatcher")
+class Test_CronDispatcher(unittest.TestCase):
+	""" test CronDispatcher class """
+
+	def setUp(self):
+		self.reports = []
+		self.report_lock = threading.Lock()
+
+	def _report(self, report):
+		with self.report_lock:
+			self.reports.append(report)
+
+	def _statuses(self):
+		with self.report_lock:
+			return sorted((r.job_id, r.status) for r in self.reports)
+
+	def _make_dispatcher(self, **kwds):
+		dispatcher = crontimesequence.CronDispatcher(report_func=self._report, **kwds)
+		self.addCleanup(dispatcher.shutdown)
+		return dispatcher
+
+	def test_run_due_jobs(self):
+		""" check if callbacks of due jobs run with fire time and are reported """
+
+		dispatcher = self._make_dispatcher()
+		fired = []
+		done = threading.Event()
+
+		def callback(fire_time):
+			fired.append(fire_time)
+			if len(fired) == 2:
+				done.set()
+
+		after = datetime.datetime(2012, 7, 20, 10, 39, 20)
+		dispatcher.add_job("hourly", crontimesequence.parse_cronstring("0", "*", "*", "*", "*"), callback, after=after)
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 10, 59)), 0)
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 11, 0)), 1)
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 12, 0)), 1)
+		self.assertTrue(done.wait(5))
+		dispatcher.shutdown()
+		self.assertEqual(sorted(fired), [datetime.datetime(2012, 7, 20, 11, 0), datetime.datetime(2012, 7, 20, 12, 0)])
+		self.assertEqual(self._statuses(), [("hourly", "done"), ("hourly", "done")])
+		self.assertTrue(all(r.queue_delay >= 0.0 for r in self.reports))
+	# ### def test_run_due_jobs
+
+	def test_max_concurrency(self):
+		""" check if fires of job wait in queue while the job runs max concurrency instances """
+
+		dispatcher = self._make_dispatcher(max_workers=4)
+		release = threading.Event()
+		running = []
+
+		def callback(fire_time):
+			running.append(fire_time)
+			release.wait(5)
+
+		minutely = crontimesequence.parse_cronstring("*", "*", "*", "*", "*")
+		dispatcher.add_job("minutely", minutely, callback, max_concurrency=2, after=datetime.datetime(2012, 7, 20, 10, 0))
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 10, 3)), 3)
+		self.assertEqual(dispatcher.queue_size(), 1)
+		release.set()
+		dispatcher.shutdown()
+		self.assertEqual(dispatcher.queue_size(), 0)
+		self.assertEqual(self._statuses(), [("minutely", "done")] * 3)
+	# ### def test_max_concurrency
+
+	def test_drop_policy(self):
+		""" check if fires are dropped when queue is full under drop policy """
+
+		lock_free = []
+
+		def report_func(report):
+			# the dispatcher lock must be available to other threads while reporting
+			prober = threading.Thread(target=dispatcher.queue_size)
+			prober.start()
+			prober.join(1)
+			lock_free.append(not prober.is_alive())
+			self._report(report)
+
+		dispatcher = crontimesequence.CronDispatcher(max_workers=1, max_queue=1, overflow_policy=crontimesequence.OVERFLOW_DROP, report_func=report_func)
+		self.addCleanup(dispatcher.shutdown)
+		release = threading.Event()
+		minutely = crontimesequence.parse_cronstring("*", "*", "*", "*", "*")
+		dispatcher.add_job("minutely", minutely, lambda fire_time: release.wait(5), after=datetime.datetime(2012, 7, 20, 10, 0))
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 10, 4)), 2)
+		release.set()
+		dispatcher.shutdown()
+		self.assertEqual(self._statuses(), [("minutely", "done")] * 2 + [("minutely", "dropped")] * 2)
+		self.assertEqual(lock_free, [True] * 4)
+	# ### def test_drop_policy
+
+	def test_coalesce_policy(self):
+		""" check if fires are coalesced into queued fire of the same job only when queue is full """
+
+		dispatcher = self._make_dispatcher(max_workers=1, max_queue=2, overflow_policy=crontimesequence.OVERFLOW_COALESCE)
+		release = threading.Event()
+		hourly = crontimesequence.parse_cronstring("0", "*", "*", "*", "*")
+		minutely = crontimesequence.parse_cronstring("*", "*", "*", "*", "*")
+		dispatcher.add_job("busy", hourly, lambda fire_time: release.wait(5), after=datetime.datetime(2012, 7, 20, 10, 0))
+		dispatcher.add_job("minutely", minutely, lambda fire_time: None, after=datetime.datetime(2012, 7, 20, 10, 59))
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 11, 0)), 2)
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 11, 3)), 1)
+		dispatcher.add_job("other", crontimesequence.parse_cronstring("*/5", "*", "*", "*", "*"), lambda fire_time: None, after=datetime.datetime(2012, 7, 20, 11, 3))
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 11, 5)), 0)
+		release.set()
+		dispatcher.shutdown()
+		self.assertEqual(self._statuses(), [("busy", "done")] + [("minutely", "coalesced")] * 4 + [("minutely", "done")] * 2 + [("other", "dropped")])
+		self.assertEqual(sorted([r.coalesced for r in self.reports if r.status == "done" and r.job_id == "minutely"]), [0, 4])
+	# ### def test_coalesce_policy
+
+	def test_coalesce_policy_with_room(self):
+		""" check if fires are queued without coalescing while queue has room """
+
+		dispatcher = self._make_dispatcher(max_workers=1, max_queue=100, overflow_policy=crontimesequence.OVERFLOW_COALESCE)
+		release = threading.Event()
+		hourly = crontimesequence.parse_cronstring("0", "*", "*", "*", "*")
+		minutely = crontimesequence.parse_cronstring("*", "*", "*", "*", "*")
+		dispatcher.add_job("busy", hourly, lambda fire_time: release.wait(5), after=datetime.datetime(2012, 7, 20, 10, 0))
+		dispatcher.add_job("minutely", minutely, lambda fire_time: None, after=datetime.datetime(2012, 7, 20, 10, 59))
+		self.assertEqual(dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 11, 9)), 11)
+		release.set()
+		dispatcher.shutdown()
+		self.assertEqual(self._statuses(), [("busy", "done")] + [("minutely", "done")] * 10)
+		self.assertTrue(all(r.coalesced == 0 for r in self.reports))
+	# ### def test_coalesce_policy_with_room
+
+	def test_block_policy(self):
+		""" check if dispatching blocks until queue has space under block policy """
+
+		dispatcher = self._make_dispatcher(max_workers=1, max_queue=1)
+		release = threading.Event()
+		minutely = crontimesequence.parse_cronstring("*", "*", "*", "*", "*")
+		dispatcher.add_job("minutely", minutely, lambda fire_time: release.wait(5), after=datetime.datetime(2012, 7, 20, 10, 0))
+		worker = threading.Thread(target=dispatcher.dispatch_due, args=(datetime.datetime(2012, 7, 20, 10, 3), ))
+		worker.start()
+		worker.join(0.2)
+		self.assertTrue(worker.is_alive())
+		release.set()
+		worker.join(5)
+		self.assertFalse(worker.is_alive())
+		dispatcher.shutdown()
+		self.assertEqual(self._statuses(), [("minutely", "done")] * 3)
+	# ### def test_block_policy
+
+	def test_failed_callback(self):
+		""" check if exception in callback is reported as failed """
+
+		def callback(fire_time):
+			raise RuntimeError("boom")
+
+		dispatcher = self._make_dispatcher()
+		dispatcher.add_job("broken", crontimesequence.parse_cronstring("*", "*", "*", "*", "*"), callback, after=datetime.datetime(2012, 7, 20, 10, 0))
+		logger = logging.getLogger(crontimesequence.__name__)
+		logger.disabled = True
+		try:
+			dispatcher.dispatch_due(datetime.datetime(2012, 7, 20, 10, 1))
+			dispatcher.shutdown()
+		finally:
+			logger.disabled = False
+		self.assertEqual(self._statuses(), [("broken", "failed")])
+	# ### def test_failed_callback
+# ### class Test_CronDispatcher
+
+
+@skip_unless_provided("iter_range_by_rule_parallel")
+class Test_ParallelRange(unittest.TestCase):
+	""" test process pool expansion of ranges """
+
+	def test_split_range_by_months(self):
+		""" check if chunks are aligned to the first day of month """
+
+		self.assertEqual(crontimesequence._split_range_by_months(datetime.datetime(2012, 11, 20, 10, 39), datetime.datetime(2013, 5, 3), 3), [
+				(datetime.datetime(2012, 11, 20, 10, 39), datetime.datetime(2013, 2, 1)),
+				(datetime.datetime(2013, 2, 1), datetime.datetime(2013, 5, 1)),
+				(datetime.datetime(2013, 5, 1), datetime.datetime(2013, 5, 3)),
+		])
+		self.assertEqual(crontimesequence._split_range_by_months(datetime.datetime(2013, 5, 3), datetime.datetime(2013, 5, 3), 3), [])
+	# ### def test_split_range_by_months
+
+	def test_same_as_sequential(self):
+		""" check if parallel expansion gives the same time-stamps in order as sequential expansion """
+
+		tstamp_start = datetime.datetime(2011, 10, 17, 9, 26, 41)
+		tstamp_end = datetime.datetime(2014, 3, 2, 5, 0)
+		rulearrays = [crontimesequence.parse_cronstring(*rule) for rule in REFERENCE_CRONRULES[1:]]
+		rulearrays.append(crontimesequence.CronSchedule("*/7", "3", "*", "*", "*"))
+		for rulearray in rulearrays:
+			expect = crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end)
+			result = crontimesequence.filter_range_by_rule_parallel(rulearray, tstamp_start, tstamp_end, max_workers=2, months_per_chunk=7)
+			self.assertEqual(result, expect)
+		self.assertEqual(crontimesequence.filter_range_by_rule_parallel(rulearrays[0], tstamp_end, tstamp_start), [])
+	# ### def test_same_as_sequential
+
+	def test_close_early(self):
+		""" check if closing the generator before all chunks are consumed stops expanding the remaining chunks """
+
+		rulearray = crontimesequence.parse_cronstring("0", "*", "*", "*", "*")
+		gen = crontimesequence.iter_range_by_rule_parallel(rulearray, datetime.datetime(2012, 1, 1), datetime.datetime(2032, 1, 1), max_workers=2, months_per_chunk=1)
+		self.assertEqual(next(gen), datetime.datetime(2012, 1, 1, 0, 0))
+		self.assertEqual(next(gen), datetime.datetime(2012, 1, 1, 1, 0))
+		gen.close()
+	# ### def test_close_early
+
+	def test_rulearray_from_initializer(self):
+		""" check if chunk without rule array is expanded with the rule array kept by the worker initializer """
+
+		compiled = crontimesequence.compile_rulearray(crontimesequence.parse_cronstring("19", "*/3", "*", "*", "*"))
+		chunk_start = datetime.datetime(2012, 2, 1)
+		chunk_end = datetime.datetime(2012, 3, 1)
+		expect = crontimesequence._expand_range_chunk((compiled, chunk_start, chunk_end))
+		self.assertEqual(len(expect), 29 * 8)
+		crontimesequence._init_range_worker(compiled)
+		self.addCleanup(crontimesequence._init_range_worker, None)
+		self.assertEqual(crontimesequence._expand_range_chunk((None, chunk_start, chunk_end)), expect)
+	# ### def test_rulearray_from_initializer
+# ### class Test_ParallelRange
+
+
+@skip_unless_provided("parse_cronstring_with_second")
+class Test_SecondField(unittest.TestCase):
+	""" test six-field rule arrays with leading second field """
+
+	def test_parse_cronstring_second(self):
+		""" check if the generated rule set of second field have correct rule items """
+
+		ruleset = crontimesequence.parse_cronstring_second("*/10", raise_error=True)
+		self.assertEqual(len(ruleset), 6)
+		is_rule_dateset_compatible(self, ruleset, [datetime.datetime(2012, 6, 30, 8, 3, i) for i in range(0, 60, 10)], True)
+		is_rule_dateset_compatible(self, ruleset, [datetime.datetime(2012, 6, 30, 8, 3, i) for i in range(5, 60, 10)], False)
+		self.assertEqual(len(crontimesequence.parse_cronstring_second("45-", raise_error=False)), 0)
+		rulearray = crontimesequence.parse_cronstring_with_second("*/10", "5", "*", "*", "*", "*")
+		self.assertEqual(len(rulearray), 6)
+		self.assertTrue(crontimesequence.check_timestamp_by_rule(rulearray, datetime.datetime(2012, 6, 30, 8, 5, 20)))
+		self.assertFalse(crontimesequence.check_timestamp_by_rule(rulearray, datetime.datetime(2012, 6, 30, 8, 5, 21)))
+		self.assertFalse(crontimesequence.check_timestamp_by_rule(rulearray, datetime.datetime(2012, 6, 30, 8, 6, 20)))
+	# ### def test_parse_cronstring_second
+
+	def test_same_as_scanning(self):
+		""" check if range, reverse range and next/previous fire time agree with second-by-second scanning """
+
+		tstamp_start = datetime.datetime(2012, 2, 29, 22, 57, 31, 500)
+		tstamp_end = datetime.datetime(2012, 3, 1, 1, 3, 7)
+		increment_delta = datetime.timedelta(seconds=1)
+		for rule in (("*/10", "*", "*", "*", "*", "*"), ("5,17-19", "*/7", "0,23", "L", "*", "*"), ("0", "0", "0", "1", "*", "*"), ("30", "0", "0", "31", "2", "*")):
+			rulearray = crontimesequence.parse_cronstring_with_second(*rule, raise_error=True)
+			expect = []
+			d = tstamp_start.replace(microsecond=0)
+			while d < tstamp_end:
+				if crontimesequence.check_timestamp_by_rule(rulearray, d):
+					expect.append(d)
+				d = d + increment_delta
+			self.assertEqual(crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end), expect)
+			self.assertEqual(list(crontimesequence.iter_reverse_range_by_rule(rulearray, tstamp_start, tstamp_end)), expect[::-1])
+			for fire_time in expect:
+				self.assertEqual(crontimesequence.next_fire_time(rulearray, fire_time - increment_delta), fire_time)
+				self.assertEqual(crontimesequence.previous_fire_time(rulearray, fire_time + increment_delta), fire_time)
+		rulearray = crontimesequence.compile_rulearray(crontimesequence.parse_cronstring_with_second("*/10", "*", "*", "*", "*", "*"))
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, datetime.datetime(2012, 12, 31, 23, 59, 50)), datetime.datetime(2013, 1, 1))
+		self.assertEqual(crontimesequence.previous_fire_time(rulearray, datetime.datetime(2013, 1, 1)), datetime.datetime(2012, 12, 31, 23, 59, 50))
+	# ### def test_same_as_scanning
+
+	def test_batch_count_and_parallel(self):
+		""" check if batch check, counting and parallel expansion work per second """
+
+		rulearray = crontimesequence.parse_cronstring_with_second("*/20", "*", "*", "*", "*", "*")
+		tstamp_start = datetime.datetime(2012, 1, 31, 23, 58, 10)
+		tstamp_end = datetime.datetime(2012, 2, 1, 0, 2, 5)
+		expect = crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end)
+		self.assertEqual(len(expect), 12)
+		self.assertEqual(crontimesequence.count_range_by_rule(rulearray, tstamp_start, tstamp_end), 12)
+		self.assertEqual(crontimesequence.filter_range_by_rule_parallel(rulearray, tstamp_start, tstamp_end, max_workers=2, months_per_chunk=1), expect)
+		tstamps = [tstamp_start + datetime.timedelta(seconds=(idx * 7)) for idx in range(50)]
+		self.assertEqual(crontimesequence.check_timestamps_by_rule(rulearray, tstamps), [crontimesequence.check_timestamp_by_rule(rulearray, d) for d in tstamps])
+		self.assertEqual(crontimesequence.check_timestamps_by_rule(rulearray, tstamps, True), [d for d in tstamps if d.second % 20 == 0])
+	# ### def test_batch_count_and_parallel
+
+	def test_reject_minute_based(self):
+		""" check if minute based entry points reject six-field rule array """
+
+		rulearray = crontimesequence.parse_cronstring_with_second("*/20", "*", "*", "*", "*", "*")
+		after = datetime.datetime(2012, 1, 31, 23, 58, 10)
+		self.assertRaises(ValueError, crontimesequence.RuleIndex().add, "job", rulearray)
+		self.assertRaises(ValueError, crontimesequence.TimingWheelScheduler().add, "job", rulearray, after)
+		if numpy is not None:
+			self.assertRaises(ValueError, crontimesequence.mask_by_rule, rulearray, [after])
+			self.assertRaises(ValueError, crontimesequence.RuleTable, [rulearray])
+		scheduler = crontimesequence.CronScheduler()
+		scheduler.add("job", rulearray, after)
+		self.assertEqual(scheduler.pop_due(datetime.datetime(2012, 1, 31, 23, 59, 0)), [
+				(datetime.datetime(2012, 1, 31, 23, 58, 20), "job"),
+				(datetime.datetime(2012, 1, 31, 23, 58, 40), "job"),
+				(datetime.datetime(2012, 1, 31, 23, 59, 0), "job"),
+		])
+	# ### def test_reject_minute_based
+
+	def test_next_fire_time_near_datetime_max(self):
+		""" check if next_fire_time returns None instead of overflowing at the last second of datetime range """
+
+		rulearray = crontimesequence.parse_cronstring_with_second("*", "*", "*", "*", "*", "*")
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, datetime.datetime(9999, 12, 31, 23, 59, 58)), datetime.datetime(9999, 12, 31, 23, 59, 59))
+		self.assertTrue(crontimesequence.next_fire_time(rulearray, datetime.datetime.max) is None)
+	# ### def test_next_fire_time_near_datetime_max
+# ### class Test_SecondField
+
+
+@skip_unless_provided("next_fire_time")
+@unittest.skipIf(zoneinfo is None, "zoneinfo is not available")
+class Test_TimeZone(unittest.TestCase):
+	""" test time zone aware evaluation of rule arrays """
+
+	def setUp(self):
+		try:
+			self.tz = zoneinfo.ZoneInfo("America/New_York")
+		except zoneinfo.ZoneInfoNotFoundError:
+			self.skipTest("time zone database is not available")
+
+	def _utc(self, tstamps):
+		return [d.astimezone(datetime.timezone.utc).replace(tzinfo=None) for d in tstamps]
+
+	def test_gap(self):
+		""" check if wall times skipped by spring forward gap fire once at the transition """
+
+		rulearray = crontimesequence.parse_cronstring("*/20", "2", "*", "*", "*")
+		result = crontimesequence.filter_range_by_rule(rulearray, datetime.datetime(2021, 3, 13, 12, 0), datetime.datetime(2021, 3, 15, 2, 30), "America/New_York")
+		self.assertEqual([d.replace(tzinfo=None) for d in result], [
+				datetime.datetime(2021, 3, 14, 3, 0),
+				datetime.datetime(2021, 3, 15, 2, 0),
+				datetime.datetime(2021, 3, 15, 2, 20),
+		])
+		self.assertEqual(self._utc(result), [
+				datetime.datetime(2021, 3, 14, 7, 0),
+				datetime.datetime(2021, 3, 15, 6, 0),
+				datetime.datetime(2021, 3, 15, 6, 20),
+		])
+		self.assertTrue(all((d.tzinfo is self.tz) for d in result))
+	# ### def test_gap
+
+	def test_fold(self):
+		""" check if wall times repeated by fall back fold fire once at the first occurrence """
+
+		rulearray = crontimesequence.parse_cronstring("*/30", "*", "*", "*", "*")
+		result = crontimesequence.filter_range_by_rule(rulearray, datetime.datetime(2021, 11, 7, 0, 0), datetime.datetime(2021, 11, 7, 3, 0), self.tz)
+		self.assertEqual(self._utc(result), [
+				datetime.datetime(2021, 11, 7, 4, 0),
+				datetime.datetime(2021, 11, 7, 4, 30),
+				datetime.datetime(2021, 11, 7, 5, 0),
+				datetime.datetime(2021, 11, 7, 5, 30),
+				datetime.datetime(2021, 11, 7, 7, 0),
+				datetime.datetime(2021, 11, 7, 7, 30),
+		])
+		# start at the second occurrence of 01:15, the first occurrence of 01:30 has passed
+		tstamp_start = datetime.datetime(2021, 11, 7, 1, 15, fold=1, tzinfo=self.tz)
+		result = crontimesequence.filter_range_by_rule(rulearray, tstamp_start, datetime.datetime(2021, 11, 7, 8, 0, tzinfo=datetime.timezone.utc), self.tz)
+		self.assertEqual(self._utc(result), [datetime.datetime(2021, 11, 7, 7, 0), datetime.datetime(2021, 11, 7, 7, 30)])
+		after = datetime.datetime(2021, 11, 7, 5, 31, tzinfo=datetime.timezone.utc)
+		self.assertEqual(crontimesequence.next_fire_time(rulearray, after, self.tz), datetime.datetime(2021, 11, 7, 2, 0, tzinfo=self.tz))
+	# ### def test_fold
+
+	def test_same_as_naive_without_transition(self):
+		""" check if evaluation in fixed offset zone gives the naive result with tzinfo attached """
+
+		tz = datetime.timezone(datetime.timedelta(hours=9))
+		tstamp_start = datetime.datetime(2012, 2, 27, 11, 42)
+		tstamp_end = datetime.datetime(2012, 3, 2, 9, 15)
+		for rule in REFERENCE_CRONRULES:
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			expect = [d.replace(tzinfo=tz) for d in crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end)]
+			self.assertEqual(crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end, tz), expect)
+	# ### def test_same_as_naive_without_transition
+
+	def test_reverse_search(self):
+		""" check if descending search across transitions gives the ascending result in reverse """
+
+		ranges = (
+				(datetime.datetime(2021, 3, 13, 12, 0), datetime.datetime(2021, 3, 15, 2, 30)),
+				(datetime.datetime(2021, 11, 6, 23, 10), datetime.datetime(2021, 11, 7, 3, 0)),
+		)
+		rules = (("*/20", "2", "*", "*", "*"), ("*/30", "*", "*", "*", "*"), ("15", "1", "*", "*", "*"))
+		for tstamp_start, tstamp_end in ranges:
+			for rule in rules:
+				rulearray = crontimesequence.parse_cronstring(*rule)
+				expect = crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end, self.tz)
+				result = list(crontimesequence.iter_reverse_range_by_rule(rulearray, tstamp_start, tstamp_end, self.tz))
+				self.assertEqual(self._utc(result), self._utc(reversed(expect)), rule)
+				self.assertEqual(crontimesequence.previous_fire_time(rulearray, tstamp_end, self.tz), expect[-1])
+		# the first occurrence of 01:00 is before the second occurrence of 01:10
+		before = datetime.datetime(2021, 11, 7, 1, 10, fold=1, tzinfo=self.tz)
+		previous_d = crontimesequence.previous_fire_time(crontimesequence.parse_cronstring("0", "1", "*", "*", "*"), before, self.tz)
+		self.assertEqual(self._utc([previous_d]), [datetime.datetime(2021, 11, 7, 5, 0)])
+	# ### def test_reverse_search
+
+	def test_schedule_methods(self):
+		""" check if CronSchedule methods take time zone """
+
+		schedule = crontimesequence.CronSchedule("30", "2", "*", "*", "*")
+		after = datetime.datetime(2021, 3, 13, 12, 0)
+		self.assertEqual(schedule.next_after(after, self.tz), datetime.datetime(2021, 3, 14, 3, 0, tzinfo=self.tz))
+		self.assertEqual(schedule.previous_before(datetime.datetime(2021, 3, 14, 12, 0), "America/New_York"), datetime.datetime(2021, 3, 14, 3, 0, tzinfo=self.tz))
+		self.assertEqual(list(schedule.iter_range(after, datetime.datetime(2021, 3, 16), self.tz)), [
+				datetime.datetime(2021, 3, 14, 3, 0, tzinfo=self.tz),
+				datetime.datetime(2021, 3, 15, 2, 30, tzinfo=self.tz),
+		])
+	# ### def test_schedule_methods
+# ### class Test_TimeZone
+
+
+@skip_unless_provided("check_epoch_by_rule")
+class Test_EpochInteger(unittest.TestCase):
+	""" test Unix epoch integer based functions """
+
+	def _to_epoch(self, d, utc_offset):
+		return int((d - datetime.datetime(1970, 1, 1)).total_seconds()) - utc_offset
+
+	def test_civil_days(self):
+		""" check if integer date arithmetic agrees with datetime.date """
+
+		epoch_date = datetime.date(1970, 1, 1)
+		for day_number in list(range(-719162, 2932897, 9973)) + [-1, 0, 59, 60, 11016, 2932896]:
+			d = epoch_date + datetime.timedelta(days=day_number)
+			self.assertEqual(crontimesequence._civil_from_days(day_number), (d.year, d.month, d.day))
+			self.assertEqual(crontimesequence._days_from_civil(d.year, d.month, d.day), day_number)
+	# ### def test_civil_days
+
+	def test_same_as_datetime_functions(self):
+		""" check if epoch functions agree with datetime based functions under fixed offsets """
+
+		tstamp_start = datetime.datetime(2012, 2, 27, 11, 42, 30)
+		tstamp_end = datetime.datetime(2012, 3, 2, 9, 15)
+		rulearrays = [crontimesequence.parse_cronstring(*rule) for rule in REFERENCE_CRONRULES]
+		rulearrays.append(crontimesequence.parse_cronstring_with_second("*/20", "*/30", "*", "*", "*", "*"))
+		for utc_offset in (0, 9 * 3600, datetime.timedelta(hours=-5, minutes=-30)):
+			offset_seconds = int(utc_offset.total_seconds()) if isinstance(utc_offset, datetime.timedelta) else utc_offset
+			epoch_start = self._to_epoch(tstamp_start, offset_seconds)
+			epoch_end = self._to_epoch(tstamp_end, offset_seconds)
+			for rulearray in rulearrays:
+				rulearray = crontimesequence.compile_rulearray(rulearray)
+				expect = [self._to_epoch(d, offset_seconds) for d in crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end)]
+				result = crontimesequence.filter_epoch_range_by_rule(rulearray, epoch_start, epoch_end, utc_offset)
+				self.assertEqual(result.typecode, 'q')
+				self.assertEqual(list(result), expect)
+				d = crontimesequence.next_fire_time(rulearray, tstamp_start)
+				self.assertEqual(crontimesequence.next_fire_epoch(rulearray, epoch_start, utc_offset), None if (d is None) else self._to_epoch(d, offset_seconds))
+				for epoch in expect:
+					self.assertTrue(crontimesequence.check_epoch_by_rule(rulearray, epoch, utc_offset))
+				for epoch in range(epoch_start, epoch_end, 4219):
+					d = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=(epoch + offset_seconds))
+					self.assertEqual(crontimesequence.check_epoch_by_rule(rulearray, epoch, utc_offset), crontimesequence.check_timestamp_by_rule(rulearray, d))
+		self.assertTrue(crontimesequence.check_epoch_by_rule(rulearrays[1], 1342783140, 3600))
+		self.assertFalse(crontimesequence.check_epoch_by_rule(rulearrays[1], 1342783140))
+	# ### def test_same_as_datetime_functions
+# ### class Test_EpochInteger
+
+
+@skip_unless_provided("TimestampSequence")
+class Test_TimestampSequence(unittest.TestCase):
+	""" test compact result of filter_range_by_rule """
+
+	def test_same_as_list(self):
+		""" check if compact result behaves as the list result """
+
+		tstamp_start = datetime.datetime(2012, 2, 27, 11, 42, 30)
+		tstamp_end = datetime.datetime(2012, 3, 2, 9, 15, 0, 500)
+		rulearrays = [crontimesequence.parse_cronstring(*rule) for rule in REFERENCE_CRONRULES]
+		rulearrays.append(crontimesequence.parse_cronstring_with_second("*/20", "*/30", "*", "*", "*", "*"))
+		for rulearray in rulearrays:
+			expect = crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end)
+			result = crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end, compact=True)
+			self.assertTrue(isinstance(result, crontimesequence.TimestampSequence))
+			self.assertEqual(result.values.typecode, 'q')
+			self.assertEqual(len(result), len(expect))
+			self.assertEqual(list(result), expect)
+			self.assertEqual(list(reversed(result)), expect[::-1])
+			self.assertEqual(list(result[3:-2:2]), expect[3:-2:2])
+			if expect:
+				self.assertEqual(result[0], expect[0])
+				self.assertEqual(result[-1], expect[-1])
+				self.assertEqual(result.index(expect[len(expect) // 2]), len(expect) // 2)
+		result = crontimesequence.filter_range_by_rule(rulearrays[1], tstamp_start, tstamp_end, compact=True)
+		expect = list(result)
+		probes = (
+				tstamp_start,
+				datetime.datetime(2012, 2, 28, 0, 19),
+				datetime.datetime(2012, 2, 28, 0, 19, 0, 1),
+				datetime.datetime(2012, 2, 28, 0, 18, 59),
+				tstamp_end,
+		)
+		for d in probes:
+			self.assertEqual(result.bisect_left(d), bisect.bisect_left(expect, d))
+			self.assertEqual(result.bisect_right(d), bisect.bisect_right(expect, d))
+			self.assertEqual(d in result, d in expect)
+		self.assertRaises(ValueError, result.index, datetime.datetime(2012, 2, 28, 0, 20))
+		self.assertRaises(ValueError, crontimesequence.filter_range_by_rule, rulearrays[1], tstamp_start, tstamp_end, datetime.timezone.utc, True)
+	# ### def test_same_as_list
+# ### class Test_TimestampSequence
+
+
+@skip_unless_provided("iter_intervals_by_rule")
+class Test_IntervalOutput(unittest.TestCase):
+	""" test interval output of iter_intervals_by_rule and filter_intervals_by_rule """
+
+	def _merge_runs(self, tstamps, unit_delta):
+		result = []
+		for d in tstamps:
+			if result and (result[-1][1] == d):
+				result[-1] = (result[-1][0], d + unit_delta)
+			else:
+				result.append((d, d + unit_delta))
+		return result
+
+	def test_business_hours(self):
+		""" check if business hours rule gives one interval for each weekday """
+
+		rulearray = crontimesequence.parse_cronstring("*", "9-17", "*", "*", "1-5")
+		result = crontimesequence.filter_intervals_by_rule(rulearray, datetime.datetime(2012, 7, 20, 10, 39, 20), datetime.datetime(2012, 7, 25, 12, 0))
+		self.assertEqual(result, [
+				(datetime.datetime(2012, 7, 20, 10, 39), datetime.datetime(2012, 7, 20, 18, 0)),
+				(datetime.datetime(2012, 7, 23, 9, 0), datetime.datetime(2012, 7, 23, 18, 0)),
+				(datetime.datetime(2012, 7, 24, 9, 0), datetime.datetime(2012, 7, 24, 18, 0)),
+				(datetime.datetime(2012, 7, 25, 9, 0), datetime.datetime(2012, 7, 25, 12, 0)),
+		])
+		rulearray = crontimesequence.parse_cronstring("*", "22-23,0-1", "*", "*", "*")
+		result = crontimesequence.filter_intervals_by_rule(rulearray, datetime.datetime(2012, 7, 20, 0, 0), datetime.datetime(2012, 7, 22, 0, 0))
+		self.assertEqual(result, [
+				(datetime.datetime(2012, 7, 20, 0, 0), datetime.datetime(2012, 7, 20, 2, 0)),
+				(datetime.datetime(2012, 7, 20, 22, 0), datetime.datetime(2012, 7, 21, 2, 0)),
+				(datetime.datetime(2012, 7, 21, 22, 0), datetime.datetime(2012, 7, 22, 0, 0)),
+		])
+	# ### def test_business_hours
+
+	def test_same_as_merged_range(self):
+		""" check if intervals equal to merged runs of filter_range_by_rule """
+
+		tstamp_start = datetime.datetime(2012, 2, 27, 11, 42, 30)
+		tstamp_end = datetime.datetime(2012, 3, 2, 9, 15, 0, 500)
+		for rule in REFERENCE_CRONRULES + (("0-29", "*", "*", "*", "*"), ):
+			rulearray = crontimesequence.parse_cronstring(*rule)
+			expect = self._merge_runs(crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end), datetime.timedelta(minutes=1))
+			self.assertEqual(crontimesequence.filter_intervals_by_rule(rulearray, tstamp_start, tstamp_end), expect)
+		rulearray = crontimesequence.parse_cronstring_with_second("0-9,50-59", "*/2", "*", "*", "*", "*")
+		tstamp_end = datetime.datetime(2012, 2, 27, 13, 0)
+		expect = self._merge_runs(crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end), datetime.timedelta(seconds=1))
+		self.assertEqual(crontimesequence.filter_intervals_by_rule(rulearray, tstamp_start, tstamp_end), expect)
+	# ### def test_same_as_merged_range
+# ### class Test_IntervalOutput
+
+
+@skip_unless_provided("nth_fire_after")
+class Test_nth_fire_after(unittest.TestCase):
+	""" test nth_fire_after function """
+
+	def test_same_as_enumeration(self):
+		""" check if k-th fire time equals to the k-th element of range enumeration """
+
+		after = datetime.datetime(2012, 2, 27, 11, 42, 30)
+		rulearrays = [crontimesequence.compile_rulearray(crontimesequence.parse_cronstring(*rule)) for rule in REFERENCE_CRONRULES]
+		rulearrays.append(crontimesequence.compile_rulearray(crontimesequence.parse_cronstring_with_second("*/20", "*/30", "*", "*", "*", "*")))
+		for rulearray in rulearrays:
+			fire_time = crontimesequence.next_fire_time(rulearray, after)
+			expect = [] if (fire_time is None) else list(itertools.islice(crontimesequence.iter_range_by_rule(rulearray, fire_time), 200))
+			for k in (1, 2, 3, 30, 31, 199, 200):
+				self.assertEqual(crontimesequence.nth_fire_after(rulearray, after, k), expect[k - 1] if (k <= len(expect)) else None)
+		self.assertRaises(ValueError, crontimesequence.nth_fire_after, rulearrays[0], after, 0)
+	# ### def test_same_as_enumeration
+
+	def test_large_k(self):
+		""" check if far occurrence is located by arithmetic """
+
+		rulearray = crontimesequence.parse_cronstring("*/2", "*", "*", "*", "*")
+		after = datetime.datetime(2020, 1, 1)
+		self.assertEqual(crontimesequence.nth_fire_after(rulearray, after, 1000000), after + datetime.timedelta(minutes=2000000))
+		rulearray = crontimesequence.parse_cronstring("0", "0", "29", "2", "*")
+		self.assertEqual(crontimesequence.nth_fire_after(rulearray, datetime.datetime(2012, 2, 29), 25), datetime.datetime(2116, 2, 29))
+	# ### def test_large_k
+# ### class Test_nth_fire_after
+
+
+@skip_unless_provided("fires_in_range")
+class Test_fires_in_range(unittest.TestCase):
+	""" test fires_in_range function """
+
+	def test_same_as_filter_range(self):
+		""" check if existence check agrees with filter_range_by_rule """
+
+		tstamp_start = datetime.datetime(2012, 2, 27, 11, 42, 30)
+		rulearrays = [crontimesequence.compile_rulearray(crontimesequence.parse_cronstring(*rule)) for rule in REFERENCE_CRONRULES]
+		rulearrays.append(crontimesequence.compile_rulearray(crontimesequence.parse_cronstring_with_second("*/20", "*/30", "*", "*", "*", "*")))
+		deltas = (
+				datetime.timedelta(0),
+				datetime.timedelta(seconds=29),
+				datetime.timedelta(seconds=30),
+				datetime.timedelta(minutes=20),
+				datetime.timedelta(hours=13),
+				datetime.timedelta(days=2),
+				datetime.timedelta(days=45),
+				datetime.timedelta(days=800),
+		)
+		for rulearray in rulearrays:
+			for delta in deltas:
+				tstamp_end = tstamp_start + delta
+				expect = bool(crontimesequence.filter_range_by_rule(rulearray, tstamp_start, tstamp_end))
+				self.assertEqual(crontimesequence.fires_in_range(rulearray, tstamp_start, tstamp_end), expect)
+	# ### def test_same_as_filter_range
+
+	def test_leap_day(self):
+		""" check if leap day rule is found only in ranges which cover a leap day """
+
+		rulearray = crontimesequence.parse_cronstring("0", "0", "29", "2", "*")
+		self.assertFalse(crontimesequence.fires_in_range(rulearray, datetime.datetime(2012, 2, 29, 0, 1), datetime.datetime(2016, 2, 29)))
+		self.assertTrue(crontimesequence.fires_in_range(rulearray, datetime.datetime(2012, 2, 29, 0, 1), datetime.datetime(2016, 2, 29, 0, 0, 1)))
+		self.assertFalse(crontimesequence.fires_in_range(rulearray, datetime.datetime(2096, 3, 1), datetime.datetime(2104, 2, 29)))
+		rulearray = crontimesequence.parse_cronstring("0", "0", "31", "2", "*")
+		self.assertFalse(crontimesequence.fires_in_range(rulearray, datetime.datetime(2000, 1, 1), datetime.datetime(2400, 1, 1)))
+	# ### def test_leap_day
+# ### class Test_fires_in_range
+
+
 
 if __name__ == '__main__':
 	logging.basicConfig(stream=sys.stderr)
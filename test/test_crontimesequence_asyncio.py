@@ -0,0 +1,98 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# asyncio integration tests are kept apart from test_crontimesequence.py since the
+# async syntax cannot be parsed by Python 2
+
+import unittest
+import sys
+import asyncio
+import datetime
+
+# {{{ import target module
+try:
+	import crontimesequence #@UnusedImport
+except Exception:
+	sys.path.append('lib3')
+	import crontimesequence #@Reimport
+# }}} import target module
+
+
+def run_coroutine(coro):
+	""" run given coroutine in a new event loop (asyncio.run is not available before Python 3.7) """
+	loop = asyncio.new_event_loop()
+	try:
+		asyncio.set_event_loop(loop)
+		return loop.run_until_complete(coro)
+	finally:
+		loop.run_until_complete(loop.shutdown_asyncgens())
+		asyncio.set_event_loop(None)
+		loop.close()
+# ### def run_coroutine
+
+
+class FakeWallClock(object):
+	""" wall clock which starts at given time-stamp and advances with the monotonic clock """
+
+	def __init__(self, tstamp_start):
+		self.tstamp_start = tstamp_start
+		self.monotonic_start = None
+
+	def __call__(self):
+		now = asyncio.get_event_loop().time()
+		if self.monotonic_start is None:
+			self.monotonic_start = now
+		return self.tstamp_start + datetime.timedelta(seconds=(now - self.monotonic_start))
+# ### class FakeWallClock
+
+
+class Test_AsyncioIntegration(unittest.TestCase):
+	""" test sleep_until_next and aiter_fires """
+
+	def test_sleep_until_next(self):
+		""" check if sleep_until_next wakes at the next fire time """
+
+		async def run_sleep():
+			clock = FakeWallClock(datetime.datetime(2012, 7, 20, 12, 59, 59, 900000))
+			fire_time = await crontimesequence.sleep_until_next(crontimesequence.parse_cronstring("0", "*", "*", "*", "*"), clock)
+			return (fire_time, clock())
+
+		fire_time, woke_at = run_coroutine(run_sleep())
+		self.assertEqual(fire_time, datetime.datetime(2012, 7, 20, 13, 0))
+		self.assertTrue(woke_at >= fire_time)
+		self.assertTrue(run_coroutine(crontimesequence.sleep_until_next(crontimesequence.parse_cronstring("0", "0", "31", "2", "*"))) is None)
+	# ### def test_sleep_until_next
+
+	def test_aiter_fires(self):
+		""" check if aiter_fires yields missed fire times only when catching up """
+
+		async def collect(catch_up, count):
+			clock = FakeWallClock(datetime.datetime(2012, 7, 20, 12, 59, 59, 950000))
+			result = []
+			schedule = crontimesequence.CronSchedule("*", "*", "*", "*", "*")
+			fires = crontimesequence.aiter_fires(schedule, datetime.datetime(2012, 7, 20, 12, 57, 30), clock, catch_up)
+			try:
+				async for fire_time in fires:
+					result.append(fire_time)
+					if len(result) == count:
+						break
+			finally:
+				await fires.aclose()
+			return result
+
+		self.assertEqual(run_coroutine(collect(True, 3)), [
+				datetime.datetime(2012, 7, 20, 12, 58),
+				datetime.datetime(2012, 7, 20, 12, 59),
+				datetime.datetime(2012, 7, 20, 13, 0),
+		])
+		self.assertEqual(run_coroutine(collect(False, 1)), [datetime.datetime(2012, 7, 20, 13, 0)])
+	# ### def test_aiter_fires
+# ### class Test_AsyncioIntegration
+
+
+if __name__ == '__main__':
+	unittest.main()
+# <<< if __name__ == '__main__':
+
+
+# vim: ts=4 sw=4 ai nowrap